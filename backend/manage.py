@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Jobber Pro backend.
+
+Usage:
+    python manage.py migrate-dates [--batch-size 1000]
+    python manage.py migrate-job-notes [--batch-size 500]
+    python manage.py lowercase-client-emails [--batch-size 1000]
+    python manage.py backfill-phone-digits [--batch-size 1000]
+    python manage.py indexes [--build] [--drop] [--yes]
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+import typer
+from pymongo import UpdateOne
+
+from server import (
+    INDEXES, JobNote, build_indexes, bump_collection_version, db, diff_collection_indexes, job_note_summary,
+    phone_digits
+)
+
+cli = typer.Typer(help="Jobber Pro maintenance commands")
+
+@cli.callback()
+def main():
+    """Jobber Pro maintenance commands."""
+
+# Date fields written by the API; older clients and imports stored some of them as ISO strings
+DATE_FIELDS = {
+    "jobs": ["scheduled_date", "completed_date", "created_at", "updated_at"],
+    "invoices": ["due_date", "paid_date", "created_at", "updated_at"],
+    "time_entries": ["start_time", "end_time", "created_at", "updated_at"],
+}
+
+def parse_date_string(value: str) -> Optional[datetime]:
+    """Parse an ISO 8601 string into the naive UTC datetime the API stores."""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+async def save_checkpoint(name: str, last_id, **fields):
+    await db.migrations.update_one(
+        {"name": name},
+        {"$set": {"last_id": last_id, "updated_at": datetime.utcnow(), **fields}},
+        upsert=True
+    )
+
+async def bump_versions(collection: str, company_ids):
+    """Bump the collection's version for every tenant a batch touched, as the request handlers do."""
+    for company_id in sorted(filter(None, company_ids)):
+        await bump_collection_version(company_id, collection)
+
+async def migrate_collection_dates(collection: str, fields, batch_size: int):
+    """Convert string dates to BSON dates in _id order, checkpointing after every batch."""
+    name = f"normalize_dates:{collection}"
+    state = await db.migrations.find_one({"name": name})
+    string_filter = {"$or": [{field: {"$type": "string"}} for field in fields]}
+    if state and state.get("completed"):
+        remaining = await db[collection].count_documents(string_filter)
+        if remaining <= state.get("failed_documents", 0):
+            typer.echo(f"{collection}: already migrated, no new string dates")
+            return
+        # Strings written after the completed run (older clients, imports); rescan from the start
+        typer.echo(f"{collection}: migrated before, but {remaining} documents have string dates; rescanning")
+        state = {"converted": state.get("converted", 0)}
+
+    last_id = state.get("last_id") if state else None
+    converted = state.get("converted", 0) if state else 0
+    failed = state.get("failed_documents", 0) if state else 0  # documents left with an unparseable date
+
+    while True:
+        query = {"_id": {"$gt": last_id}, **string_filter} if last_id is not None else string_filter
+        docs = await db[collection].find(query, {"company_id": 1, **{field: 1 for field in fields}}).sort("_id", 1).to_list(batch_size)
+        if not docs:
+            break
+
+        operations = []
+        company_ids = set()
+        for doc in docs:
+            update = {}
+            unparseable = False
+            for field in fields:
+                value = doc.get(field)
+                if isinstance(value, str):
+                    parsed = parse_date_string(value)
+                    if parsed is None:
+                        unparseable = True
+                    else:
+                        update[field] = parsed
+            failed += unparseable
+            if update:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": update}))
+                company_ids.add(doc.get("company_id"))
+
+        if operations:
+            await db[collection].bulk_write(operations, ordered=False)
+            await bump_versions(collection, company_ids)
+            converted += len(operations)
+
+        last_id = docs[-1]["_id"]
+        await save_checkpoint(name, last_id, converted=converted, failed_documents=failed)
+        typer.echo(f"{collection}: {converted} documents converted")
+
+    await save_checkpoint(name, last_id, converted=converted, failed_documents=failed, completed=True)
+    typer.echo(f"{collection}: done, {converted} converted, {failed} documents with unparseable dates left as strings")
+
+@cli.command("migrate-dates")
+def migrate_dates(
+    batch_size: int = typer.Option(1000, help="Documents per read/bulk_write batch"),
+    restart: bool = typer.Option(False, help="Ignore saved checkpoints and rescan from the start"),
+):
+    """Convert ISO string dates in jobs, invoices and time entries to BSON dates."""
+    async def run():
+        if restart:
+            await db.migrations.delete_many({"name": {"$regex": "^normalize_dates:"}})
+        for collection, fields in DATE_FIELDS.items():
+            await migrate_collection_dates(collection, fields, batch_size)
+
+    asyncio.run(run())
+
+def embedded_job_notes(job: dict):
+    """JobNote documents for a job's embedded notes and photo paths.
+
+    Ids derive from the job id and array position, so a rerun after an interrupted batch
+    upserts the same notes instead of duplicating them.
+    """
+    fallback = job.get("created_at") or datetime.utcnow()
+    notes, photos = [], []
+    for position, note in enumerate(job.get("notes") or []):
+        created_at = note.get("created_at")
+        if isinstance(created_at, str):
+            created_at = parse_date_string(created_at)
+        notes.append(JobNote(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"job-note:{job['id']}:note:{position}")),
+            job_id=job["id"], company_id=job["company_id"], text=note.get("text"),
+            created_by=note.get("created_by"), created_at=created_at or fallback
+        ).dict())
+    for position, path in enumerate(job.get("photos") or []):
+        photos.append(JobNote(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"job-note:{job['id']}:photo:{position}")),
+            job_id=job["id"], company_id=job["company_id"], kind="photo", photo_path=path, created_at=fallback
+        ).dict())
+    return notes, photos
+
+async def migrate_embedded_job_notes(batch_size: int):
+    """Move jobs' embedded notes and photos into job_notes in _id order, checkpointing after every batch."""
+    name = "job_notes"
+    state = await db.migrations.find_one({"name": name})
+    embedded_filter = {"$or": [{"notes": {"$exists": True}}, {"photos": {"$exists": True}}]}
+    if state and state.get("completed"):
+        remaining = await db.jobs.count_documents(embedded_filter)
+        if not remaining:
+            typer.echo("jobs: notes already migrated, no embedded notes left")
+            return
+        # Jobs written with arrays after the completed run (old clients, restored backups); rescan
+        typer.echo(f"jobs: notes migrated before, but {remaining} jobs have embedded notes or photos; rescanning")
+        state = {"moved": state.get("moved", 0)}
+
+    last_id = state.get("last_id") if state else None
+    moved = state.get("moved", 0) if state else 0
+    projection = {"id": 1, "company_id": 1, "notes": 1, "photos": 1, "last_note": 1, "created_at": 1}
+
+    while True:
+        query = {"_id": {"$gt": last_id}, **embedded_filter} if last_id is not None else embedded_filter
+        jobs = await db.jobs.find(query, projection).sort("_id", 1).to_list(batch_size)
+        if not jobs:
+            break
+
+        note_operations, job_operations = [], []
+        now = datetime.utcnow()
+        for job in jobs:
+            notes, photos = embedded_job_notes(job)
+            note_operations.extend(UpdateOne({"id": note["id"]}, {"$setOnInsert": note}, upsert=True) for note in notes + photos)
+            # Counters are incremented, not set, so notes added through the API before migrating still count
+            update = {
+                "$unset": {"notes": "", "photos": ""},
+                "$inc": {"notes_count": len(notes), "photos_count": len(photos)},
+                "$set": {"updated_at": now},  # the job's shape changed, so delta sync resends it
+            }
+            if notes and not job.get("last_note"):
+                update["$set"]["last_note"] = job_note_summary(max(notes, key=lambda note: note["created_at"]))
+            job_operations.append(UpdateOne({"_id": job["_id"]}, update))
+            moved += len(notes) + len(photos)
+
+        # Notes first: a job only loses its arrays once its notes are safely stored
+        if note_operations:
+            await db.job_notes.bulk_write(note_operations, ordered=False)
+        await db.jobs.bulk_write(job_operations, ordered=False)
+        await bump_versions("jobs", {job["company_id"] for job in jobs})
+
+        last_id = jobs[-1]["_id"]
+        await save_checkpoint(name, last_id, moved=moved)
+        typer.echo(f"jobs: {moved} notes and photos moved")
+
+    await save_checkpoint(name, last_id, moved=moved, completed=True)
+    typer.echo(f"jobs: done, {moved} notes and photos moved to job_notes")
+
+@cli.command("migrate-job-notes")
+def migrate_job_notes(
+    batch_size: int = typer.Option(500, help="Jobs per read/bulk_write batch"),
+    restart: bool = typer.Option(False, help="Ignore the saved checkpoint and rescan from the start"),
+):
+    """Move embedded job notes and photo paths into the job_notes collection."""
+    async def run():
+        if restart:
+            await db.migrations.delete_many({"name": "job_notes"})
+        await migrate_embedded_job_notes(batch_size)
+
+    asyncio.run(run())
+
+@cli.command("lowercase-client-emails")
+def lowercase_client_emails(
+    batch_size: int = typer.Option(1000, help="Clients per read/bulk_write batch"),
+):
+    """Lowercase stored client emails; run before building the unique (company_id, email) index."""
+    async def run():
+        updated, conflicts = 0, 0
+        last_id = None
+        mixed_case = {"email": {"$regex": "[A-Z]"}}
+        projection = {"_id": 1, "id": 1, "company_id": 1, "email": 1}
+        while True:
+            query = {"_id": {"$gt": last_id}, **mixed_case} if last_id is not None else mixed_case
+            clients = await db.clients.find(query, projection).sort("_id", 1).to_list(batch_size)
+            if not clients:
+                break
+            last_id = clients[-1]["_id"]
+
+            # One $in lookup per batch for clients already holding the lowercased emails
+            lowered = {client["_id"]: client["email"].strip().lower() for client in clients}
+            taken = {
+                (doc["company_id"], doc["email"]): doc
+                async for doc in db.clients.find({"email": {"$in": list(set(lowered.values()))}}, projection)
+            }
+            operations, company_ids = [], set()
+            now = datetime.utcnow()
+            for client in clients:
+                key = (client["company_id"], lowered[client["_id"]])
+                holder = taken.get(key)
+                if holder is not None and holder["_id"] != client["_id"]:
+                    conflicts += 1
+                    typer.echo(f"conflict: clients {client['id']} and {holder['id']} share {key[1]}; merge them by hand")
+                    continue
+                taken[key] = client
+                operations.append(UpdateOne({"_id": client["_id"]}, {"$set": {"email": key[1], "updated_at": now}}))
+                company_ids.add(client["company_id"])
+            if operations:
+                await db.clients.bulk_write(operations, ordered=False)
+                await bump_versions("clients", company_ids)
+                updated += len(operations)
+        typer.echo(f"clients: {updated} emails lowercased, {conflicts} conflicts left as they are")
+
+    asyncio.run(run())
+
+@cli.command("backfill-phone-digits")
+def backfill_phone_digits(
+    batch_size: int = typer.Option(1000, help="Clients per read/bulk_write batch"),
+):
+    """Store the digits of each client's phone, which /api/search matches numeric queries against."""
+    async def run():
+        updated = 0
+        last_id = None
+        missing = {"phone_digits": {"$exists": False}}
+        while True:
+            query = {"_id": {"$gt": last_id}, **missing} if last_id is not None else missing
+            clients = await db.clients.find(query, {"_id": 1, "phone": 1}).sort("_id", 1).to_list(batch_size)
+            if not clients:
+                break
+            last_id = clients[-1]["_id"]
+            # phone_digits is never returned by the API, so versions and updated_at are left alone
+            await db.clients.bulk_write([
+                UpdateOne({"_id": client["_id"]}, {"$set": {"phone_digits": phone_digits(client.get("phone"))}})
+                for client in clients
+            ], ordered=False)
+            updated += len(clients)
+        typer.echo(f"clients: phone digits stored for {updated} clients")
+
+    asyncio.run(run())
+
+def format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+async def index_usage(collection: str):
+    """Index sizes from $collStats and access counters from $indexStats, summed across shards."""
+    sizes, usage = {}, {}
+    async for stats in db[collection].aggregate([{"$collStats": {"storageStats": {}}}]):
+        for name, size in stats.get("storageStats", {}).get("indexSizes", {}).items():
+            sizes[name] = sizes.get(name, 0) + size
+    async for stats in db[collection].aggregate([{"$indexStats": {}}]):
+        ops, since = usage.get(stats["name"], (0, None))
+        accesses = stats.get("accesses", {})
+        usage[stats["name"]] = (ops + accesses.get("ops", 0), min(filter(None, [since, accesses.get("since")]), default=None))
+    return sizes, usage
+
+@cli.command()
+def indexes(
+    build: bool = typer.Option(False, help="Create declared indexes that are missing"),
+    drop: bool = typer.Option(False, help="Drop undeclared indexes, and ones whose options differ, after confirmation"),
+    yes: bool = typer.Option(False, "--yes", help="Do not ask before dropping"),
+    collection: Optional[str] = typer.Option(None, help="Only this collection"),
+):
+    """Report declared vs actual indexes with sizes and usage; optionally build or drop."""
+    async def run():
+        collections = [collection] if collection else list(INDEXES)
+        for name in collections:
+            diff = await diff_collection_indexes(db, name)
+            sizes, usage = await index_usage(name) if name in await db.list_collection_names() else ({}, {})
+
+            def describe(index_name: str) -> str:
+                ops, since = usage.get(index_name, (0, None))
+                since_text = f" since {since:%Y-%m-%d}" if since else ""
+                return f"{index_name:<50} {format_bytes(sizes.get(index_name, 0)):>10} {ops:>12,} ops{since_text}"
+
+            typer.echo(name)
+            for index_name in diff["present"]:
+                typer.echo(f"  ok        {describe(index_name)}")
+            for model in diff["missing"]:
+                typer.echo(f"  missing   {model.document['name']}")
+            for index_name in diff["changed"]:
+                typer.echo(f"  changed   {describe(index_name)}")
+            for index_name in diff["undeclared"]:
+                typer.echo(f"  undeclared {describe(index_name)}")
+
+            if drop:
+                for index_name in diff["changed"] + diff["undeclared"]:
+                    if yes or typer.confirm(f"Drop {name}.{index_name}?", default=False):
+                        await db[name].drop_index(index_name)
+                        typer.echo(f"  dropped {index_name}")
+            if build and (diff["missing"] or drop and diff["changed"]):
+                # Builds on MongoDB 4.2+ are online: reads and writes continue while they run
+                started = time.perf_counter()
+                built = (await build_indexes(db, [name])).get(name, [])
+                if built:
+                    typer.echo(f"  built {', '.join(built)} in {time.perf_counter() - started:.1f}s")
+                else:
+                    typer.echo("  nothing to build")
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    cli()
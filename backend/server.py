@@ -1,48 +1,775 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks, Query, Request, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse, ORJSONResponse, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from motor.frameworks import asyncio as motor_asyncio_framework
+from pymongo import IndexModel, ReadPreference, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, DuplicateKeyError, ExecutionTimeout, PyMongoError
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import TYPE_CHECKING, List, Optional, Dict, Any, Union
 from datetime import datetime, timedelta
 from pathlib import Path
 import os
 import logging
+import asyncio
+import threading
+import time
+import bisect
+import itertools
+import signal
+import sys
+import traceback
+import importlib.util
+from collections import Counter, OrderedDict, deque
+from contextvars import ContextVar
 import jwt
 import bcrypt
 import uuid
-import smtplib
-# Email imports commented out as they're not used in current implementation
-# from email.mime.text import MimeText
-# from email.mime.multipart import MimeMultipart
-import stripe
 from dotenv import load_dotenv
 import json
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.pdfgen import canvas
+import csv
+import zlib
+import hashlib
+import base64
+import functools
+import unicodedata
 import io
+# Heavy optional dependencies (pandas, reportlab, stripe, smtplib/email) are imported where
+# they are used so they stay off the cold-start path; tests/test_import_time.py enforces it.
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Query tracking
+MONGO_QUERY_BUDGET = int(os.environ.get('MONGO_QUERY_BUDGET', '50'))  # commands per request
+MONGO_REPEAT_THRESHOLD = int(os.environ.get('MONGO_REPEAT_THRESHOLD', '10'))  # same shape per request
+MONGO_QUERY_BUDGET_STRICT = os.environ.get('MONGO_QUERY_BUDGET_STRICT', '').lower() in ('1', 'true', 'yes')
+QUERY_FILTER_KEYS = ("filter", "query", "pipeline", "updates", "deletes")
+
+class QueryBudgetExceeded(Exception):
+    """Raised in strict mode when a request breaks the Mongo query budget."""
+
+class RequestQueryStats:
+    """Mongo commands issued on behalf of one request."""
+
+    def __init__(self):
+        self.lock = threading.Lock()  # listener callbacks run on Motor's executor threads
+        self.count = 0
+        self.total_micros = 0
+        self.slowest_micros = 0
+        self.slowest_command = None
+        self.shapes = Counter()
+        self.pending = {}
+        self.closed = False
+
+request_query_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar('request_query_stats', default=None)
+route_query_stats: Dict[str, Dict[str, Any]] = {}
+
+def query_shape(value: Any) -> Any:
+    """Strip literal values from a filter so equivalent queries compare equal."""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in sorted(value.items())}
+    if isinstance(value, list):
+        return [query_shape(v) for v in value[:1]]
+    return "?"
+
+def command_shape(command_name: str, command: dict) -> str:
+    collection = command.get(command_name)
+    query = next((command[key] for key in QUERY_FILTER_KEYS if key in command), None)
+    return f"{command_name} {collection} {json.dumps(query_shape(query), default=str)}"
+
+class QueryTracker(monitoring.CommandListener):
+    """Attribute every Mongo command to the request that issued it."""
+
+    def started(self, event):
+        stats = request_query_stats.get()
+        if stats is None or stats.closed:
+            return
+        shape = command_shape(event.command_name, event.command)
+        with stats.lock:
+            stats.count += 1
+            stats.pending[(event.connection_id, event.request_id)] = shape
+            if event.command_name != "getMore":  # paging one cursor is not a repeat
+                stats.shapes[shape] += 1
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        mongo_command_duration.observe(event.duration_micros / 1e6, event.command_name)
+        stats = request_query_stats.get()
+        if stats is None:
+            return
+        with stats.lock:
+            shape = stats.pending.pop((event.connection_id, event.request_id), None)
+            if shape is None:
+                return
+            stats.total_micros += event.duration_micros
+            if event.duration_micros > stats.slowest_micros:
+                stats.slowest_micros = event.duration_micros
+                stats.slowest_command = shape
+
+query_tracker = QueryTracker()
+
+# Metrics
+# Prometheus-style metrics kept in plain dicts and preallocated lists. Updates happen on
+# the event loop (or, for Mongo timings, Motor's executor threads) without locks: an
+# occasional lost increment under thread contention is an accepted trade for the cost.
+METRICS = []
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def format_labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+class MetricCounter:
+    """Monotonic counter, one value per label combination.
+
+    Metrics whose values live elsewhere (cache stats, pool sizes) pass a callback
+    returning (label_values, value) pairs, which is read at scrape time instead.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.callback = callback
+        self.values: Dict[tuple, float] = {}
+        METRICS.append(self)
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        values = self.callback() if self.callback is not None else list(self.values.items())
+        for label_values, value in values:
+            yield self.name, tuple(label_values), value
+
+class MetricGauge(MetricCounter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) - amount
+
+    def set(self, value: float, *label_values):
+        self.values[label_values] = value
+
+class MetricHistogram:
+    """Histogram with fixed bucket bounds; each label set owns a preallocated count list."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self.children: Dict[tuple, list] = {}  # label values -> [bucket counts, sum]
+        METRICS.append(self)
+
+    def observe(self, value: float, *label_values):
+        child = self.children.get(label_values)
+        if child is None:
+            child = self.children[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        child[0][bisect.bisect_left(self.buckets, value)] += 1
+        child[1] += value
+
+    def samples(self):
+        for label_values, (counts, total) in list(self.children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", label_values + (le,), cumulative
+            yield f"{self.name}_sum", label_values, total
+            yield f"{self.name}_count", label_values, cumulative
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, label_values, value in metric.samples():
+            names = metric.labels + ("le",) if name.endswith("_bucket") else metric.labels
+            lines.append(f"{name}{format_labels(names, label_values)} {value}")
+    return "\n".join(lines) + "\n"
+
+http_requests_total = MetricCounter(
+    "http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status"))
+http_request_duration = MetricHistogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"))
+http_requests_in_flight = MetricGauge(
+    "http_requests_in_flight", "Requests currently being handled by route template.", ("method", "route"))
+mongo_command_duration = MetricHistogram(
+    "mongodb_command_duration_seconds", "Mongo command latency by command name.", ("command",))
+
+def executor_queue_depths():
+    """Pending work items in the thread pools that Motor and run_in_executor use."""
+    yield ("motor",), motor_asyncio_framework._EXECUTOR._work_queue.qsize()
+    try:
+        default_executor = asyncio.get_running_loop()._default_executor
+    except RuntimeError:
+        default_executor = None
+    yield ("default",), default_executor._work_queue.qsize() if default_executor else 0
+
+MetricGauge("executor_queue_depth", "Work items waiting for a thread pool worker.", ("executor",),
+            callback=executor_queue_depths)
+
+instrumented_caches: Dict[str, Any] = {}  # name -> cache exposing hits and misses
+
+def cache_request_counts():
+    for name, cache in instrumented_caches.items():
+        yield (name, "hit"), cache.hits
+        yield (name, "miss"), cache.misses
+
+def cache_hit_ratios():
+    for name, cache in instrumented_caches.items():
+        lookups = cache.hits + cache.misses
+        yield (name,), cache.hits / lookups if lookups else 0.0
+
+MetricCounter("cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"),
+              callback=cache_request_counts)
+MetricGauge("cache_hit_ratio", "Share of cache lookups served from the cache.", ("cache",),
+            callback=cache_hit_ratios)
+
+class MetricsMiddleware:
+    """ASGI middleware recording request counts and latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = route.path if route else "unmatched"
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], route_path)
+            http_requests_total.inc(scope["method"], route_path, status_code)
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute that tracks in-flight requests under its path template."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        path = self.path_format
+
+        async def instrumented_handler(request: Request):
+            method = request.method
+            http_requests_in_flight.inc(method, path)
+            try:
+                return await handler(request)
+            finally:
+                http_requests_in_flight.dec(method, path)
+
+        return instrumented_handler
+
+# Profiling
+SLOW_REQUEST_PROFILE_MS = float(os.environ.get('SLOW_REQUEST_PROFILE_MS', '0'))  # 0 disables auto-capture
+SLOW_REQUEST_PROFILE_INTERVAL_MS = float(os.environ.get('SLOW_REQUEST_PROFILE_INTERVAL_MS', '10'))
+SLOW_REQUEST_CAPTURES = int(os.environ.get('SLOW_REQUEST_CAPTURES', '20'))
+PROFILE_MAX_DEPTH = 64
+
+request_profile: ContextVar[Optional[Counter]] = ContextVar('request_profile', default=None)
+slow_request_captures = deque(maxlen=SLOW_REQUEST_CAPTURES)
+
+def collapse_stack(frame) -> str:
+    """Render a frame chain root-first in the collapsed format flamegraph tools read."""
+    names = []
+    while frame is not None and len(names) < PROFILE_MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+def format_collapsed(samples: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+class StackSampler:
+    """Statistical profiler sampling the event loop thread on SIGPROF.
+
+    The interval timer counts process CPU time, so idle waits cost nothing. Samples go
+    to the on-demand session when one is running, and to the current request's
+    profile when slow-request capture is enabled.
+    """
+
+    def __init__(self):
+        self.session: Optional[Counter] = None
+        self.background_interval = 0.0
+
+    def _handle(self, signum, frame):
+        session = self.session
+        profile = request_profile.get()
+        if session is None and profile is None:
+            return
+        stack = collapse_stack(frame)
+        if session is not None:
+            session[stack] += 1
+        if profile is not None:
+            profile[stack] += 1
+
+    def _arm(self, interval: float):
+        # Signal handlers can only be installed from the main thread, which runs the event loop
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("The sampler must be started from the main thread")
+        signal.signal(signal.SIGPROF, self._handle)
+        signal.setitimer(signal.ITIMER_PROF, interval, interval)
+
+    def enable_background(self, interval: float):
+        self.background_interval = interval
+        self._arm(interval)
+
+    async def sample(self, seconds: float, interval: float) -> Counter:
+        if self.session is not None:
+            raise HTTPException(status_code=409, detail="A profiling session is already running")
+        self.session = Counter()
+        try:
+            self._arm(interval)
+            await asyncio.sleep(seconds)
+        finally:
+            samples, self.session = self.session, None
+            if self.background_interval:
+                self._arm(self.background_interval)
+            else:
+                signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        return samples
+
+stack_sampler = StackSampler()
+
+# Event loop monitoring
+EVENT_LOOP_LAG_INTERVAL_MS = float(os.environ.get('EVENT_LOOP_LAG_INTERVAL_MS', '100'))
+EVENT_LOOP_DEBUG = os.environ.get('EVENT_LOOP_DEBUG', '').lower() in ('1', 'true', 'yes')
+BLOCKING_CALL_THRESHOLD_MS = float(os.environ.get('BLOCKING_CALL_THRESHOLD_MS', '100'))
+
+event_loop_lag = MetricHistogram(
+    "event_loop_lag_seconds", "Delay between when the lag probe should have woken and when it did.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+event_loop_lag_last = MetricGauge("event_loop_lag_last_seconds", "Most recent event loop lag measurement.")
+event_loop_blocked_total = MetricCounter(
+    "event_loop_blocked_total", "Times a callback held the loop past BLOCKING_CALL_THRESHOLD_MS (debug mode).")
+
+class EventLoopMonitor:
+    """Measures event loop lag and, in debug mode, reports the stack of callbacks that block it.
+
+    A coroutine sleeps for a fixed interval and records how late it wakes up. In debug
+    mode a watchdog thread watches that heartbeat; when it stops advancing for longer
+    than the threshold, the loop thread's current stack is the blocking code.
+    """
+
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.heartbeat = time.monotonic()
+        self.loop_thread_id = None
+        self.task = None
+        self.watchdog = None
+        self.stopped = threading.Event()
+
+    def start(self, debug: bool = False):
+        self.stopped.clear()  # the monitor is restarted when the app runs more than one lifespan
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.task = asyncio.create_task(self._probe())
+        if debug:
+            self.watchdog = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+            self.watchdog.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+
+    async def _probe(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            event_loop_lag.observe(lag)
+            event_loop_lag_last.set(lag)
+            self.heartbeat = now
+
+    def _watch(self):
+        reported = None
+        while not self.stopped.wait(self.threshold / 2):
+            heartbeat = self.heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.threshold or heartbeat == reported:
+                continue
+            reported = heartbeat  # one report per stall
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            event_loop_blocked_total.inc()
+            logging.getLogger(__name__).warning(
+                "Event loop blocked for %.0f ms so far; loop thread stack:\n%s",
+                blocked_for * 1000, "".join(traceback.format_stack(frame))
+            )
+
+event_loop_monitor = EventLoopMonitor(EVENT_LOOP_LAG_INTERVAL_MS / 1000, BLOCKING_CALL_THRESHOLD_MS / 1000)
+
+class SlowRequestProfilerMiddleware:
+    """ASGI middleware keeping stack samples for requests slower than SLOW_REQUEST_PROFILE_MS."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        profile = Counter()
+        token = request_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_profile.reset(token)
+            duration_ms = (time.perf_counter() - start) * 1000
+            if duration_ms >= SLOW_REQUEST_PROFILE_MS:
+                route = scope.get("route")
+                slow_request_captures.append({
+                    "method": scope["method"],
+                    "route": route.path if route else scope["path"],
+                    "duration_ms": round(duration_ms, 1),
+                    "captured_at": datetime.utcnow(),
+                    "samples": sum(profile.values()),
+                    "stacks": format_collapsed(profile)
+                })
+
+def record_request_queries(method: str, route: str, stats: RequestQueryStats):
+    """Fold one request's stats into the per-route totals and enforce the query budget."""
+    summary = route_query_stats.setdefault(f"{method} {route}", {
+        "requests": 0, "queries": 0, "db_time_ms": 0.0, "slowest_ms": 0.0, "slowest_command": None
+    })
+    summary["requests"] += 1
+    summary["queries"] += stats.count
+    summary["db_time_ms"] += stats.total_micros / 1000
+    if stats.slowest_micros / 1000 > summary["slowest_ms"]:
+        summary["slowest_ms"] = stats.slowest_micros / 1000
+        summary["slowest_command"] = stats.slowest_command
+
+    problems = []
+    if stats.count > MONGO_QUERY_BUDGET:
+        problems.append(f"{stats.count} Mongo commands (budget {MONGO_QUERY_BUDGET})")
+    for shape, repeats in stats.shapes.items():
+        if repeats > MONGO_REPEAT_THRESHOLD:
+            problems.append(f"possible N+1: {repeats}x {shape}")
+    if problems:
+        message = f"{method} {route}: " + "; ".join(problems)
+        logging.getLogger(__name__).warning(message)
+        if MONGO_QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+
+class QueryTrackingMiddleware:
+    """ASGI middleware that scopes Mongo command stats to each HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestQueryStats()
+        token = request_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            # Stop counting once the body is complete so background tasks are not billed to the request
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                stats.closed = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_query_stats.reset(token)
+            stats.closed = True
+        route = scope.get("route")
+        record_request_queries(scope["method"], route.path if route else "unmatched", stats)
+
+# Response compression
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))  # smaller bodies are sent as-is
+COMPRESSION_OFFLOAD_SIZE = int(os.environ.get('COMPRESSION_OFFLOAD_SIZE', str(256 * 1024)))  # compress in a thread above this
+COMPRESSION_LEVELS = {"br": 4, "zstd": 3, "gzip": 6}  # tuned for dynamic responses, not maximum ratio
+COMPRESSION_MODULES = {"br": "brotli", "zstd": "zstandard", "gzip": "zlib"}
+# Server preference when the client weights codings equally; br and zstd are used when their package is installed
+COMPRESSION_ENCODINGS = [
+    encoding for encoding in os.environ.get('COMPRESSION_ENCODINGS', 'br,zstd,gzip').split(',')
+    if encoding in COMPRESSION_MODULES and importlib.util.find_spec(COMPRESSION_MODULES[encoding])
+]
+UNCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "application/pdf", "application/zip", "application/gzip",
+                        "application/x-gzip", "application/zstd", "font/woff", "text/event-stream")
+
+def negotiate_encoding(accept_encoding: str, encodings: List[str] = COMPRESSION_ENCODINGS) -> Optional[str]:
+    """Pick the coding with the highest q-value the client accepts, breaking ties by the order of encodings."""
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    candidates = [(weights.get(e, weights.get("*", 0.0)), -rank, e) for rank, e in enumerate(encodings)]
+    q, _, encoding = max(candidates, default=(0.0, 0, None))
+    return encoding if q > 0 else None
+
+class StreamCompressor:
+    """Incremental compressor whose chunk() output is decodable as soon as it is sent."""
+
+    def __init__(self, encoding: str):
+        level = COMPRESSION_LEVELS[encoding]
+        if encoding == "br":
+            import brotli
+            compressor = brotli.Compressor(quality=level)
+            self._chunk = lambda data: compressor.process(data) + compressor.flush()
+            self._finish = compressor.finish
+        elif encoding == "zstd":
+            import zstandard
+            compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self._chunk = lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = compressor.flush
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 writes a gzip container
+            self._chunk = lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._chunk(data)
+
+    def finish(self) -> bytes:
+        return self._finish()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._chunk(data) + self._finish()
+
+async def run_compression(fn, data: bytes) -> bytes:
+    """Compress inline when cheap; large bodies go to the default executor to keep the loop free."""
+    if len(data) >= COMPRESSION_OFFLOAD_SIZE:
+        return await asyncio.get_running_loop().run_in_executor(None, fn, data)
+    return fn(data)
+
+class CompressionMiddleware:
+    """ASGI middleware negotiating br/zstd/gzip for response bodies.
+
+    Complete bodies under COMPRESSION_MIN_SIZE, already-encoded responses (such as gzipped
+    exports) and compressed media pass through untouched. Streaming responses are
+    compressed chunk by chunk so clients still receive data as it is produced.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not COMPRESSION_ENCODINGS:
+            return await self.app(scope, receive, send)
+        accept_encoding = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), "")
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if "content-encoding" in headers or content_type.startswith(UNCOMPRESSIBLE_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message  # held until the first body chunk shows the size
+                return
+            if passthrough or message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                if not more_body and len(body) < COMPRESSION_MIN_SIZE:
+                    passthrough = True
+                    await send(start_message)
+                    return await send(message)
+                compressor = StreamCompressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = await run_compression(compressor.compress, body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    return await send({"type": "http.response.body", "body": body})
+                await send(start_message)
+
+            data = await run_compression(compressor.chunk, body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+# Connection pool
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', '100'))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', '0'))  # also the number of connections opened at startup
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', '0'))  # 0 keeps idle connections open
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '0'))  # 0 waits for a connection indefinitely
+MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', '')  # e.g. "zstd,snappy,zlib"; zstd/snappy need zstandard/python-snappy
+MONGO_ANALYTICS_READ_PREFERENCE = os.environ.get('MONGO_ANALYTICS_READ_PREFERENCE', 'primary')
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+if MONGO_ANALYTICS_READ_PREFERENCE not in READ_PREFERENCES:
+    raise RuntimeError(
+        f"MONGO_ANALYTICS_READ_PREFERENCE={MONGO_ANALYTICS_READ_PREFERENCE!r} is not one of: {', '.join(READ_PREFERENCES)}"
+    )
+
+def mongo_client_options() -> Dict[str, Any]:
+    """Pool settings for the Motor client; unset values keep the driver defaults."""
+    options = {"maxPoolSize": MONGO_MAX_POOL_SIZE, "minPoolSize": MONGO_MIN_POOL_SIZE}
+    if MONGO_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = MONGO_MAX_IDLE_TIME_MS
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if MONGO_COMPRESSORS:
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+mongo_pool_checkout_wait = MetricHistogram(
+    "mongodb_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool.", ("address",))
+mongo_pool_checkout_failures = MetricCounter(
+    "mongodb_pool_checkout_failures_total", "Failed connection checkouts; reason=timeout means the pool was exhausted.",
+    ("address", "reason"))
+mongo_pool_exhausted = MetricCounter(
+    "mongodb_pool_exhausted_total", "Checkouts that started while every pooled connection was in use.", ("address",))
+mongo_pool_connections = MetricGauge(
+    "mongodb_pool_connections", "Open pooled connections.", ("address",))
+mongo_pool_checked_out = MetricGauge(
+    "mongodb_pool_checked_out", "Pooled connections currently checked out.", ("address",))
+
+class PoolTracker(monitoring.ConnectionPoolListener):
+    """Export pool size, checkout wait and exhaustion from driver pool events.
+
+    A checkout starts and finishes on the same driver thread, so the start time is
+    kept in a thread-local.
+    """
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def connection_check_out_started(self, event):
+        address = "%s:%s" % event.address
+        self.local.started = time.perf_counter()
+        if mongo_pool_checked_out.values.get((address,), 0) >= MONGO_MAX_POOL_SIZE:
+            mongo_pool_exhausted.inc(address)
+
+    def connection_checked_out(self, event):
+        address = "%s:%s" % event.address
+        mongo_pool_checkout_wait.observe(time.perf_counter() - getattr(self.local, "started", time.perf_counter()), address)
+        mongo_pool_checked_out.inc(address)
+
+    def connection_check_out_failed(self, event):
+        mongo_pool_checkout_failures.inc("%s:%s" % event.address, event.reason)
+
+    def connection_checked_in(self, event):
+        mongo_pool_checked_out.dec("%s:%s" % event.address)
+
+    def connection_created(self, event):
+        mongo_pool_connections.inc("%s:%s" % event.address)
+
+    def connection_closed(self, event):
+        mongo_pool_connections.dec("%s:%s" % event.address)
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+pool_tracker = PoolTracker()
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[query_tracker, pool_tracker], **mongo_client_options())
 db = client[os.environ['DB_NAME']]
 
+# Set while computing a result that is stored under the primary's collection versions. A lagging
+# secondary could return data from before the write that bumped those versions, and the stale
+# result would then be served until the next write.
+analytics_primary_reads: ContextVar[bool] = ContextVar('analytics_primary_reads', default=False)
+
+def analytics_db():
+    """Database handle for analytics reads, routed by MONGO_ANALYTICS_READ_PREFERENCE."""
+    if MONGO_ANALYTICS_READ_PREFERENCE == "primary" or analytics_primary_reads.get():
+        return db
+    return db.with_options(read_preference=READ_PREFERENCES[MONGO_ANALYTICS_READ_PREFERENCE])
+
 # JWT and security
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-super-secret-jwt-key-change-this-in-production')
 JWT_ALGORITHM = 'HS256'
 security = HTTPBearer()
+PLATFORM_ADMIN_EMAILS = {email.strip().lower() for email in os.environ.get('PLATFORM_ADMIN_EMAILS', '').split(',') if email.strip()}
 
 # Stripe configuration
-stripe.api_key = os.environ.get('STRIPE_SECRET_KEY', 'sk_test_...')
+STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', 'sk_test_...')
+
+def get_stripe():
+    """Import and configure the Stripe SDK on first use."""
+    import stripe
+    stripe.api_key = STRIPE_SECRET_KEY
+    return stripe
 
 # Create the main app
 app = FastAPI(title="Jobber Pro API", description="Field Service Management SaaS Platform", version="1.0.0")
@@ -56,8 +783,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request Mongo query counting and N+1 detection
+app.add_middleware(QueryTrackingMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(CompressionMiddleware)
+if SLOW_REQUEST_PROFILE_MS:
+    app.add_middleware(SlowRequestProfilerMiddleware)
+
 # Create router with /api prefix
-api_router = APIRouter(prefix="/api")
+api_router = APIRouter(prefix="/api", route_class=InstrumentedRoute)
 
 # Pydantic Models
 class UserCreate(BaseModel):
@@ -111,6 +845,18 @@ class Client(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class ClientSuggestion(BaseModel):
+    id: str
+    name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+class ClientImportResult(BaseModel):
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    errors: List[Dict[str, Any]] = []  # first few rejected rows, for the import report
+
 class JobCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -138,11 +884,26 @@ class Job(BaseModel):
     actual_cost: Optional[float] = None
     assigned_technician_id: Optional[str] = None
     company_id: str
-    photos: List[str] = []
-    notes: List[Dict[str, Any]] = []
+    notes_count: int = 0
+    photos_count: int = 0
+    last_note: Optional[Dict[str, Any]] = None  # newest text note, denormalized from job_notes
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class JobNote(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    job_id: str
+    company_id: str
+    kind: str = "note"  # note, photo
+    text: Optional[str] = None
+    photo_path: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class JobNotesPage(BaseModel):
+    notes: List[JobNote]
+    next_cursor: Optional[str] = None
+
 class InvoiceCreate(BaseModel):
     client_id: str
     job_ids: List[str]
@@ -290,6 +1051,176 @@ class FormSubmissionCreate(BaseModel):
     job_id: str
     data: Dict[str, Any] = {}
 
+# Batch Write Models
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '500'))
+BATCH_OPERATION_TYPES = ["job_status", "job_note", "time_entry_update", "form_submission"]
+
+class BatchOperation(BaseModel):
+    idempotency_key: str = Field(..., min_length=1, max_length=200)
+    type: str  # job_status, job_note, time_entry_update, form_submission
+    target_id: str  # job id, or the time entry / form id
+    data: Dict[str, Any] = {}
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., max_length=BATCH_MAX_OPERATIONS)
+
+class BatchOperationResult(BaseModel):
+    idempotency_key: str
+    status_code: int
+    id: Optional[str] = None  # document created by the operation
+    error: Optional[str] = None
+    replayed: bool = False
+
+class BatchResult(BaseModel):
+    results: List[BatchOperationResult]
+    applied: int = 0
+    replayed: int = 0
+    failed: int = 0
+
+# Search Models
+class SearchResult(BaseModel):
+    type: str  # client, job, invoice
+    id: str
+    title: Optional[str] = None
+    score: float
+    fields: Dict[str, Any] = {}
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+    timed_out: List[str] = []  # types whose queries hit SEARCH_MAX_TIME_MS and were left out
+
+# Index specs
+# Declared per collection next to the models they serve. Startup only verifies them;
+# `python manage.py indexes` reports, builds missing and drops undeclared indexes.
+# Names are left to pymongo so they match indexes created by earlier releases.
+SYNC_TOMBSTONE_TTL_DAYS = int(os.environ.get('SYNC_TOMBSTONE_TTL_DAYS', '30'))  # sync tokens older than this must resync fully
+IDEMPOTENCY_KEY_TTL_DAYS = int(os.environ.get('IDEMPOTENCY_KEY_TTL_DAYS', '7'))  # how long a batch can be replayed safely
+SEARCH_COLLATION = {"locale": "en", "strength": 2}  # case-insensitive prefix matching
+INDEX_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds", "weights")
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel("email", unique=True),
+        IndexModel("id", unique=True),
+        IndexModel([("company_id", 1), ("role", 1)]),  # technician lists
+    ],
+    "companies": [
+        IndexModel("id", unique=True),
+    ],
+    "clients": [
+        IndexModel("id", unique=True),
+        IndexModel([("company_id", 1), ("email", 1)], unique=True),  # listing, import upserts; emails stored lowercased
+        IndexModel([("company_id", 1), ("updated_at", 1), ("id", 1)]),  # delta sync
+        IndexModel([("company_id", 1), ("name", "text"), ("email", "text"), ("phone", "text")],
+                   weights={"name": 10, "email": 5, "phone": 5}),  # search
+        IndexModel([("company_id", 1), ("name", 1)], collation=SEARCH_COLLATION),  # search prefixes
+        IndexModel([("company_id", 1), ("phone_digits", 1)]),  # search by phone
+    ],
+    "jobs": [
+        IndexModel("id", unique=True),
+        IndexModel([("company_id", 1), ("status", 1), ("scheduled_date", 1)]),
+        IndexModel([("company_id", 1), ("scheduled_date", 1)]),  # unfiltered lists, today's jobs
+        IndexModel([("company_id", 1), ("client_id", 1)]),  # client analytics
+        IndexModel([("company_id", 1), ("updated_at", 1), ("id", 1)]),  # snapshots, analytics cache refresh and delta sync
+        IndexModel([("company_id", 1), ("title", "text"), ("description", "text")],
+                   weights={"title": 10, "description": 2}),  # search
+    ],
+    "invoices": [
+        IndexModel("id", unique=True),
+        IndexModel([("company_id", 1), ("status", 1)]),
+        IndexModel([("company_id", 1), ("client_id", 1)]),
+        IndexModel([("company_id", 1), ("updated_at", 1)]),
+        IndexModel([("company_id", 1), ("invoice_number", "text")], weights={"invoice_number": 1}),  # search
+        IndexModel([("company_id", 1), ("invoice_number", 1)], collation=SEARCH_COLLATION),  # search prefixes
+    ],
+    "job_notes": [
+        IndexModel("id", unique=True),
+        IndexModel([("job_id", 1), ("created_at", -1), ("id", -1)]),  # newest-first pages
+    ],
+    "time_entries": [
+        IndexModel("id", unique=True),
+        IndexModel([("company_id", 1), ("technician_id", 1), ("job_id", 1)]),
+        IndexModel([("company_id", 1), ("start_time", -1)]),
+        IndexModel([("company_id", 1), ("job_id", 1)]),
+        IndexModel([("technician_id", 1), ("end_time", 1)]),  # active entries
+        IndexModel([("company_id", 1), ("updated_at", 1), ("id", 1)]),
+    ],
+    "notifications": [
+        IndexModel("id", unique=True),
+        IndexModel([("user_id", 1), ("company_id", 1), ("created_at", -1)]),
+        IndexModel([("user_id", 1), ("is_read", 1)]),
+    ],
+    "custom_forms": [
+        IndexModel("id", unique=True),
+        IndexModel([("company_id", 1), ("service_types", 1)]),
+        IndexModel([("company_id", 1), ("updated_at", 1), ("id", 1)]),
+    ],
+    "form_submissions": [
+        IndexModel([("company_id", 1), ("form_id", 1), ("job_id", 1)]),
+    ],
+    "snapshot_watermarks": [
+        IndexModel([("company_id", 1), ("collection", 1)], unique=True),
+    ],
+    "tombstones": [
+        IndexModel([("company_id", 1), ("updated_at", 1), ("id", 1)]),
+        IndexModel("updated_at", expireAfterSeconds=SYNC_TOMBSTONE_TTL_DAYS * 86400),
+    ],
+    "idempotency_keys": [
+        IndexModel("created_at", expireAfterSeconds=IDEMPOTENCY_KEY_TTL_DAYS * 86400),
+    ],
+    "analytics_response_cache": [
+        IndexModel("company_id"),  # invalidation
+        IndexModel("expires_at", expireAfterSeconds=0),
+    ],
+}
+
+def index_key(key) -> tuple:
+    """Key pattern as index_information reports it: a text index's fields collapse into _fts/_ftsx."""
+    items = []
+    for field, direction in key:
+        if direction != "text":
+            items.append((field, direction))
+        elif ("_fts", "text") not in items:
+            items += [("_fts", "text"), ("_ftsx", 1)]
+    return tuple(items)
+
+def index_options(spec: dict) -> dict:
+    return {option: spec[option] for option in INDEX_OPTIONS if option in spec}
+
+async def diff_collection_indexes(database, collection: str) -> Dict[str, list]:
+    """Compare one collection's declared indexes with what exists, matching on key pattern."""
+    existing = await database[collection].index_information()
+    by_key = {tuple(info["key"]): (name, info) for name, info in existing.items() if name != "_id_"}
+    result = {"present": [], "missing": [], "changed": [], "undeclared": []}
+    declared_keys = set()
+    for model in INDEXES.get(collection, []):
+        spec = model.document
+        key = index_key(spec["key"].items())
+        declared_keys.add(key)
+        if key not in by_key:
+            result["missing"].append(model)
+        elif index_options(by_key[key][1]) != index_options(spec):
+            result["changed"].append(by_key[key][0])
+        else:
+            result["present"].append(by_key[key][0])
+    result["undeclared"] = [name for key, (name, _) in by_key.items() if key not in declared_keys]
+    return result
+
+async def diff_indexes(database) -> Dict[str, Dict[str, list]]:
+    """Diff every declared collection concurrently."""
+    collections = list(INDEXES)
+    results = await asyncio.gather(*(diff_collection_indexes(database, c) for c in collections))
+    return dict(zip(collections, results))
+
+async def build_indexes(database, collections: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """Create declared indexes that are missing. Returns the names built per collection."""
+    built = {}
+    for collection in collections or list(INDEXES):
+        missing = (await diff_collection_indexes(database, collection))["missing"]
+        if missing:
+            built[collection] = await database[collection].create_indexes(missing)
+    return built
+
 # Utility Functions
 def hash_password(password: str) -> str:
     """Hash a password for storing."""
@@ -332,10 +1263,176 @@ async def get_current_company(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="Company not found")
     return company
 
+async def require_platform_admin(current_user: dict = Depends(get_current_user)):
+    """Allow only operators listed in PLATFORM_ADMIN_EMAILS; company admins are tenant-scoped."""
+    if current_user["email"].lower() not in PLATFORM_ADMIN_EMAILS:
+        raise HTTPException(status_code=403, detail="Platform admin access required")
+    return current_user
+
 def generate_invoice_number() -> str:
     """Generate unique invoice number."""
     return f"INV-{datetime.utcnow().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
 
+def model_projection(model, fields: Optional[List[str]] = None) -> Dict[str, int]:
+    """Mongo projection returning exactly a model's fields (or the selected subset), without _id."""
+    return {"_id": 0, **{field: 1 for field in (fields or model.model_fields)}}
+
+def trusted_response(
+    docs: Union[List[dict], dict],
+    model,
+    fields: Optional[List[str]] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> ORJSONResponse:
+    """Serialize documents read from our own database without re-validating them.
+
+    Routes keep response_model for the OpenAPI schema; returning a response directly skips
+    FastAPI's per-row validation. Documents must come from a model_projection query with the
+    same fields, so a complete document needs no work; older ones get the model defaults filled in.
+    """
+    fill_model_defaults(docs if isinstance(docs, list) else [docs], model, fields)
+    return ORJSONResponse(docs, headers=headers)
+
+def fill_model_defaults(docs: List[dict], model, fields: Optional[List[str]] = None) -> List[dict]:
+    """Add model defaults for fields missing from documents read with model_projection."""
+    names = fields or model.model_fields
+    for doc in docs:
+        if len(doc) != len(names):
+            for name in names:
+                if name not in doc:
+                    doc[name] = model.model_fields[name].get_default(call_default_factory=True)
+    return docs
+
+def sparse_fields(model):
+    """Dependency parsing ?fields=a,b into a validated field list; None returns every field."""
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma-separated {model.__name__} fields to return; id is always included")
+    ) -> Optional[List[str]]:
+        if not fields:
+            return None
+        selected = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        unknown = [name for name in selected if name not in model.model_fields]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(model.model_fields)}"
+            )
+        if "id" in model.model_fields and "id" not in selected:
+            selected.insert(0, "id")
+        return selected
+    return dependency
+
+# Collection versions
+# A per-tenant counter for each collection, bumped after every write to it. List routes
+# derive a weak ETag from it, so an unchanged refresh is answered with 304 after a single
+# _id lookup. Code writing these collections outside the request handlers must bump too.
+async def get_collection_version(company_id: str, collection: str) -> int:
+    doc = await db.collection_versions.find_one({"_id": f"{company_id}:{collection}"}, {"version": 1})
+    return doc["version"] if doc else 0
+
+async def get_collection_versions(company_id: str, collections: List[str]) -> Dict[str, int]:
+    """Versions of several collections in one _id lookup."""
+    ids = {f"{company_id}:{collection}": collection for collection in collections}
+    versions = dict.fromkeys(collections, 0)
+    async for doc in db.collection_versions.find({"_id": {"$in": list(ids)}}, {"version": 1}):
+        versions[ids[doc["_id"]]] = doc["version"]
+    return versions
+
+async def bump_collection_version(company_id: str, *collections: str) -> Dict[str, int]:
+    """Invalidate ETags and cached analytics for the tenant's collections; call after the write has been applied.
+
+    Returns the new version of each collection.
+    """
+    _, *docs = await asyncio.gather(analytics_response_cache.invalidate(company_id), *(
+        db.collection_versions.find_one_and_update(
+            {"_id": f"{company_id}:{collection}"},
+            {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        for collection in collections
+    ))
+    if "jobs" in collections:
+        job_analytics_cache.expire(company_id)
+    return {collection: doc["version"] for collection, doc in zip(collections, docs)}
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in candidates}
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    # no-cache keeps clients revalidating with If-None-Match instead of reusing the body blindly
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def collection_etag(collection: str):
+    """Dependency computing a list route's weak ETag and answering a matching If-None-Match with 304.
+
+    The tag covers the tenant, the collection version and the query string, and is checked
+    before the route runs its query.
+    """
+    async def dependency(request: Request, current_user: dict = Depends(get_current_user)) -> str:
+        company_id = current_user["company_id"]
+        version = await get_collection_version(company_id, collection)
+        query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+        digest = hashlib.sha1(f"{company_id}:{query}".encode()).hexdigest()[:16]
+        etag = f'W/"{collection}-{version}-{digest}"'
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            raise HTTPException(status_code=304, headers=etag_headers(etag))
+        return etag
+    return dependency
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', '500'))
+IMPORT_MAX_ERRORS = 50
+
+def iter_import_rows(file: UploadFile, fmt: Optional[str] = None):
+    """Yield (row_number, row) pairs from an uploaded CSV or NDJSON file.
+
+    The file is read incrementally so large imports never sit in memory at once.
+    Rows that cannot be parsed are yielded as None.
+    """
+    if fmt is None:
+        fmt = "ndjson" if (file.filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv"
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Unsupported import format. Use csv or ndjson")
+
+    file.file.seek(0)
+    line_number = 0
+
+    def lines():
+        # Decode line by line so an invalid byte can be reported with its line number
+        nonlocal line_number
+        for line_number, raw in enumerate(file.file, start=1):
+            yield raw.decode("utf-8-sig" if line_number == 1 else "utf-8")
+
+    try:
+        if fmt == "csv":
+            for row_number, row in enumerate(csv.DictReader(lines()), start=1):
+                yield row_number, {k.strip(): (v.strip() or None) if isinstance(v, str) else v for k, v in row.items() if k}
+        else:
+            for row_number, line in enumerate(lines(), start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield row_number, row if isinstance(row, dict) else None
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail=f"File is not valid UTF-8 (line {line_number}); earlier rows may already have been imported")
+
+def batched(rows, size: int):
+    """Group an iterable into lists of at most `size` items."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
 # Authentication Routes
 @api_router.post("/auth/register", response_model=dict)
 async def register(user_data: UserCreate):
@@ -407,57 +1504,376 @@ async def login(user_data: UserLogin):
         }
     }
 
+# Client Suggestions
+CLIENT_SUGGEST_MAX_KEYS = int(os.environ.get('CLIENT_SUGGEST_MAX_KEYS', '1000000'))  # across all tenants
+CLIENT_SUGGEST_RECHECK_SECONDS = float(os.environ.get('CLIENT_SUGGEST_RECHECK_SECONDS', '5'))
+
+def normalize_suggest_text(value: str) -> str:
+    """Lowercase and strip accents, so "Müller" is found by "mull"."""
+    decomposed = unicodedata.normalize("NFKD", value.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).strip()
+
+def phone_digits(phone: Optional[str]) -> str:
+    """A phone number reduced to its digits, the form phones are indexed and matched in."""
+    return "".join(char for char in phone or "" if char.isdigit())
+
+def looks_like_phone(value: str) -> bool:
+    """Typed input made only of digits and phone punctuation, such as "(555) 999-0000"."""
+    stripped = value.strip()
+    return any(char.isdigit() for char in stripped) and all(char.isdigit() or char in "+()-. " for char in stripped)
+
+def suggest_prefix(value: str) -> str:
+    """Normalize a typed prefix; one that looks like a phone number is reduced to its digits."""
+    if looks_like_phone(value):
+        return phone_digits(value)
+    return normalize_suggest_text(value)
+
+def client_suggest_keys(client: dict) -> List[str]:
+    """Keys a client is found by: the full name and each later word of it, the email and the phone digits."""
+    name = normalize_suggest_text(client.get("name") or "")
+    words = name.split()
+    keys = {name, *(" ".join(words[i:]) for i in range(1, len(words)))}
+    if client.get("email"):
+        keys.add(normalize_suggest_text(client["email"]))
+    digits = phone_digits(client.get("phone"))
+    if digits:
+        keys.add(digits)
+    return sorted(key for key in keys if key)
+
+class ClientSuggestIndex:
+    """Per-tenant in-memory prefix index over client names, emails and phones.
+
+    Each tenant is a sorted list of (key, client id) searched with bisect. Tenants are loaded
+    on first use, updated in place by the client write routes and evicted least recently used
+    once the total key count exceeds max_keys. Writes made by other workers are picked up by
+    comparing the clients collection version at most every recheck_seconds.
+    """
+
+    def __init__(self, max_keys: int = CLIENT_SUGGEST_MAX_KEYS, recheck_seconds: float = CLIENT_SUGGEST_RECHECK_SECONDS):
+        self.max_keys = max_keys
+        self.recheck_seconds = recheck_seconds
+        self.tenants = OrderedDict()  # company_id -> {"keys", "clients", "version", "checked_at"}
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def total_keys(self) -> int:
+        return sum(len(tenant["keys"]) for tenant in self.tenants.values())
+
+    async def suggest(self, company_id: str, prefix: str, limit: int) -> List[dict]:
+        prefix = suggest_prefix(prefix)
+        if not prefix:
+            return []
+        tenant = await self._tenant(company_id)
+        keys = tenant["keys"]
+        matches = {}
+        for key, client_id in itertools.islice(keys, bisect.bisect_left(keys, (prefix,)), None):
+            if not key.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.setdefault(client_id, tenant["clients"][client_id])
+        return list(matches.values())
+
+    def upsert(self, company_id: str, client: dict, version: int):
+        tenant = self.tenants.get(company_id)
+        if tenant is None:
+            return
+        self._remove(tenant, client["id"])
+        tenant["clients"][client["id"]] = {field: client.get(field) for field in ClientSuggestion.model_fields}
+        for key in client_suggest_keys(client):
+            bisect.insort(tenant["keys"], (key, client["id"]))
+        self._advance(tenant, version)
+
+    def remove(self, company_id: str, client_id: str, version: int):
+        tenant = self.tenants.get(company_id)
+        if tenant is not None:
+            self._remove(tenant, client_id)
+            self._advance(tenant, version)
+
+    def invalidate(self, company_id: str):
+        self.tenants.pop(company_id, None)
+
+    async def _tenant(self, company_id: str) -> dict:
+        tenant = self.tenants.get(company_id)
+        if tenant is not None and time.monotonic() - tenant["checked_at"] < self.recheck_seconds:
+            self.hits += 1
+            self.tenants.move_to_end(company_id)
+            return tenant
+        async with self.locks.setdefault(company_id, asyncio.Lock()):
+            version = await get_collection_version(company_id, "clients")
+            tenant = self.tenants.get(company_id)
+            if tenant is not None and tenant["version"] == version:
+                self.hits += 1
+                tenant["checked_at"] = time.monotonic()
+            else:
+                self.misses += 1
+                tenant = await self._load(company_id, version)
+            self.tenants[company_id] = tenant
+            self.tenants.move_to_end(company_id)
+            self._evict()
+            return tenant
+
+    async def _load(self, company_id: str, version: int) -> dict:
+        clients, keys = {}, []
+        projection = {"_id": 0, **{field: 1 for field in ClientSuggestion.model_fields}}
+        async for client in db.clients.find({"company_id": company_id}, projection):
+            clients[client["id"]] = client
+            keys.extend((key, client["id"]) for key in client_suggest_keys(client))
+        keys.sort()
+        return {"keys": keys, "clients": clients, "version": version, "checked_at": time.monotonic()}
+
+    def _remove(self, tenant: dict, client_id: str):
+        previous = tenant["clients"].pop(client_id, None)
+        if previous is None:
+            return
+        keys = tenant["keys"]
+        for key in client_suggest_keys(previous):
+            position = bisect.bisect_left(keys, (key, client_id))
+            if position < len(keys) and keys[position] == (key, client_id):
+                del keys[position]
+
+    @staticmethod
+    def _advance(tenant: dict, version: int):
+        # Only this write happened since the tenant was loaded; otherwise the next recheck reloads it
+        if tenant["version"] == version - 1:
+            tenant["version"] = version
+
+    def _evict(self):
+        while len(self.tenants) > 1 and self.total_keys > self.max_keys:
+            evicted, _ = self.tenants.popitem(last=False)
+            lock = self.locks.get(evicted)
+            if lock is not None and not lock.locked():
+                del self.locks[evicted]
+
+client_suggestions = ClientSuggestIndex()
+instrumented_caches["client_suggestions"] = client_suggestions
+
 # Client Routes
+def normalize_email(email: str) -> str:
+    """Emails are stored lowercased, so (company_id, email) is unique regardless of case."""
+    return email.strip().lower()
+
 @api_router.post("/clients", response_model=Client)
 async def create_client(client_data: ClientCreate, current_user: dict = Depends(get_current_user)):
     """Create a new client."""
-    client = Client(**client_data.dict(), company_id=current_user["company_id"])
-    await db.clients.insert_one(client.dict())
+    client = Client(**{**client_data.dict(), "email": normalize_email(client_data.email)}, company_id=current_user["company_id"])
+    try:
+        await db.clients.insert_one({**client.dict(), "phone_digits": phone_digits(client.phone)})
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="A client with this email already exists")
+    versions = await bump_collection_version(current_user["company_id"], "clients")
+    client_suggestions.upsert(current_user["company_id"], client.dict(), versions["clients"])
     return client
 
+@api_router.get("/clients/suggest", response_model=List[ClientSuggestion])
+async def suggest_clients(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(get_current_user)
+):
+    """Clients whose name, any word of the name, email or phone starts with prefix."""
+    return ORJSONResponse(await client_suggestions.suggest(current_user["company_id"], prefix, limit))
+
 @api_router.get("/clients", response_model=List[Client])
-async def get_clients(current_user: dict = Depends(get_current_user)):
+async def get_clients(
+    fields: Optional[List[str]] = Depends(sparse_fields(Client)),
+    etag: str = Depends(collection_etag("clients")),
+    current_user: dict = Depends(get_current_user)
+):
     """Get all clients for current company."""
-    clients = await db.clients.find({"company_id": current_user["company_id"]}).to_list(1000)
-    return clients
+    clients = await db.clients.find({"company_id": current_user["company_id"]}, model_projection(Client, fields)).to_list(1000)
+    return trusted_response(clients, Client, fields, headers=etag_headers(etag))
 
 @api_router.get("/clients/{client_id}", response_model=Client)
-async def get_client(client_id: str, current_user: dict = Depends(get_current_user)):
+async def get_client(
+    client_id: str,
+    fields: Optional[List[str]] = Depends(sparse_fields(Client)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get specific client."""
-    client = await db.clients.find_one({"id": client_id, "company_id": current_user["company_id"]})
+    client = await db.clients.find_one({"id": client_id, "company_id": current_user["company_id"]}, model_projection(Client, fields))
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
-    return client
+    return trusted_response(client, Client, fields)
 
 @api_router.put("/clients/{client_id}", response_model=Client)
 async def update_client(client_id: str, client_data: ClientCreate, current_user: dict = Depends(get_current_user)):
     """Update client."""
     update_data = client_data.dict()
+    update_data["email"] = normalize_email(client_data.email)
+    update_data["phone_digits"] = phone_digits(client_data.phone)
     update_data["updated_at"] = datetime.utcnow()
     
-    result = await db.clients.update_one(
-        {"id": client_id, "company_id": current_user["company_id"]},
-        {"$set": update_data}
-    )
+    try:
+        result = await db.clients.update_one(
+            {"id": client_id, "company_id": current_user["company_id"]},
+            {"$set": update_data}
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="A client with this email already exists")
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
+    versions = await bump_collection_version(current_user["company_id"], "clients")
     
     updated_client = await db.clients.find_one({"id": client_id, "company_id": current_user["company_id"]})
+    client_suggestions.upsert(current_user["company_id"], updated_client, versions["clients"])
     return updated_client
 
+@api_router.post("/clients/import", response_model=ClientImportResult)
+async def import_clients(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,  # csv, ndjson; inferred from the filename when omitted
+    current_user: dict = Depends(get_current_user)
+):
+    """Bulk import clients from a CSV or NDJSON file, upserting on (company_id, lowercased email)."""
+    company_id = current_user["company_id"]
+    result = ClientImportResult()
+    seen_emails = set()
+    client_fields = list(ClientCreate.model_fields)
+
+    def reject(row_number: int, reason: str):
+        result.skipped += 1
+        if len(result.errors) < IMPORT_MAX_ERRORS:
+            result.errors.append({"row": row_number, "error": reason})
+
+    # Reading and parsing run in the default executor, so uploads that spilled to disk don't block the loop
+    batches = batched(iter_import_rows(file, format), IMPORT_BATCH_SIZE)
+    loop = asyncio.get_running_loop()
+    while (batch := await loop.run_in_executor(None, next, batches, None)) is not None:
+        # Validate and dedup within the file; the first occurrence of an email wins
+        candidates = {}
+        for row_number, row in batch:
+            if row is None:
+                reject(row_number, "Malformed row")
+                continue
+            try:
+                client_data = ClientCreate(**row)
+            except ValidationError as e:
+                reject(row_number, "; ".join(err["msg"] for err in e.errors()))
+                continue
+            email = normalize_email(client_data.email)
+            if email in seen_emails:
+                reject(row_number, "Duplicate email in file")
+                continue
+            seen_emails.add(email)
+            candidates[email] = {**client_data.dict(), "email": email, "phone_digits": phone_digits(client_data.phone)}
+
+        if not candidates:
+            continue
+
+        # One $in lookup per batch against the (company_id, email) index
+        existing = {
+            doc["email"]: doc
+            async for doc in db.clients.find(
+                {"company_id": company_id, "email": {"$in": list(candidates)}},
+                {"_id": 0, **{field: 1 for field in client_fields}}
+            )
+        }
+
+        now = datetime.utcnow()
+        operations = []
+        for email, client_data in candidates.items():
+            current = existing.get(email)
+            if current is not None and all(current.get(field) == client_data[field] for field in client_fields):
+                result.skipped += 1  # unchanged
+                continue
+            new_client = Client(**client_data, company_id=company_id).dict()
+            operations.append(UpdateOne(
+                {"company_id": company_id, "email": email},
+                {
+                    "$set": {**client_data, "updated_at": now},
+                    "$setOnInsert": {
+                        k: v for k, v in new_client.items()
+                        if k not in client_data and k != "updated_at"
+                    }
+                },
+                upsert=True
+            ))
+
+        if operations:
+            try:
+                write_result = await db.clients.bulk_write(operations, ordered=False)
+                result.inserted += write_result.upserted_count
+                result.updated += write_result.matched_count
+            except BulkWriteError as e:
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+                result.inserted += e.details["nUpserted"]
+                result.updated += e.details["nMatched"]
+                # A concurrent import inserted these emails after our lookup; the retry matches and updates them
+                retry = [operations[error["index"]] for error in e.details["writeErrors"]]
+                write_result = await db.clients.bulk_write(retry, ordered=False)
+                result.inserted += write_result.upserted_count
+                result.updated += write_result.matched_count
+
+    if result.inserted or result.updated:
+        await bump_collection_version(company_id, "clients")
+        client_suggestions.invalidate(company_id)
+    return result
+
 # Job Routes
+JOB_STATUSES = ["scheduled", "in_progress", "completed", "cancelled"]
+JOB_NOTES_PAGE_SIZE = 50
+
+def job_note_summary(note: dict) -> dict:
+    """The subset of a note copied onto its job as last_note."""
+    return {field: note[field] for field in ("id", "text", "created_by", "created_at")}
+
+def job_note_id(scope: str, idempotency_key: Optional[str]) -> str:
+    """Note id derived from the write's idempotency key, so a retried write upserts the same note."""
+    if not idempotency_key:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"job-note:{scope}:{idempotency_key}"))
+
+async def record_job_note(note: dict, job_update: dict) -> bool:
+    """Store a note, then count it on its job along with job_update; False when the job is missing.
+
+    The note is written first so the job never counts a note that does not exist. A note that
+    was already stored by an earlier attempt is not counted again, and a fresh note is removed
+    if the job write fails so the retry starts clean.
+    """
+    result = await db.job_notes.update_one({"id": note["id"]}, {"$setOnInsert": note}, upsert=True)
+    inserted = result.upserted_id is not None
+    if inserted:
+        counter = "photos_count" if note["kind"] == "photo" else "notes_count"
+        job_update = {**job_update, "$inc": {counter: 1}}
+    try:
+        updated = await db.jobs.update_one({"id": note["job_id"], "company_id": note["company_id"]}, job_update)
+    except PyMongoError:
+        if inserted:
+            await db.job_notes.delete_one({"id": note["id"]})
+        raise
+    if updated.matched_count == 0:
+        if inserted:
+            await db.job_notes.delete_one({"id": note["id"]})
+        return False
+    return True
+
+def encode_note_cursor(note: dict) -> str:
+    return base64.urlsafe_b64encode(f"{note['created_at'].isoformat()}|{note['id']}".encode()).decode()
+
+def decode_note_cursor(cursor: str):
+    try:
+        created_at, note_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), note_id
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @api_router.post("/jobs", response_model=Job)
 async def create_job(job_data: JobCreate, current_user: dict = Depends(get_current_user)):
     """Create a new job."""
     job = Job(**job_data.dict(), company_id=current_user["company_id"])
     await db.jobs.insert_one(job.dict())
+    await bump_collection_version(current_user["company_id"], "jobs")
     return job
 
 @api_router.get("/jobs", response_model=List[Job])
 async def get_jobs(
     status: Optional[str] = None,
     priority: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(sparse_fields(Job)),
+    etag: str = Depends(collection_etag("jobs")),
     current_user: dict = Depends(get_current_user)
 ):
     """Get all jobs for current company with optional filtering."""
@@ -467,56 +1883,78 @@ async def get_jobs(
     if priority:
         filter_dict["priority"] = priority
     
-    jobs = await db.jobs.find(filter_dict).sort("scheduled_date", 1).to_list(1000)
-    return jobs
+    jobs = await db.jobs.find(filter_dict, model_projection(Job, fields)).sort("scheduled_date", 1).to_list(1000)
+    return trusted_response(jobs, Job, fields, headers=etag_headers(etag))
 
 @api_router.get("/jobs/{job_id}", response_model=Job)
-async def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+async def get_job(
+    job_id: str,
+    fields: Optional[List[str]] = Depends(sparse_fields(Job)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get specific job."""
-    job = await db.jobs.find_one({"id": job_id, "company_id": current_user["company_id"]})
+    job = await db.jobs.find_one({"id": job_id, "company_id": current_user["company_id"]}, model_projection(Job, fields))
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    return trusted_response(job, Job, fields)
 
 @api_router.put("/jobs/{job_id}/status")
 async def update_job_status(
     job_id: str, 
     status: str, 
     notes: Optional[str] = None,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: dict = Depends(get_current_user)
 ):
     """Update job status."""
-    valid_statuses = ["scheduled", "in_progress", "completed", "cancelled"]
-    if status not in valid_statuses:
+    if status not in JOB_STATUSES:
         raise HTTPException(status_code=400, detail="Invalid status")
     
-    update_data = {
-        "status": status,
-        "updated_at": datetime.utcnow()
-    }
-    
+    now = datetime.utcnow()
+    update = {"$set": {"status": status, "updated_at": now}}
     if status == "completed":
-        update_data["completed_date"] = datetime.utcnow()
+        update["$set"]["completed_date"] = now
     
     if notes:
-        update_data["$push"] = {
-            "notes": {
-                "text": notes,
-                "created_by": current_user["full_name"],
-                "created_at": datetime.utcnow()
-            }
-        }
-    
-    result = await db.jobs.update_one(
-        {"id": job_id, "company_id": current_user["company_id"]},
-        {"$set": update_data} if not notes else {"$set": {k: v for k, v in update_data.items() if k != "$push"}, **update_data}
-    )
+        note = JobNote(
+            id=job_note_id(f"{current_user['company_id']}:{current_user['id']}", idempotency_key),
+            job_id=job_id, company_id=current_user["company_id"], text=notes,
+            created_by=current_user["full_name"], created_at=now
+        ).dict()
+        update["$set"]["last_note"] = job_note_summary(note)
+        found = await record_job_note(note, update)
+    else:
+        found = (await db.jobs.update_one({"id": job_id, "company_id": current_user["company_id"]}, update)).matched_count > 0
     
-    if result.matched_count == 0:
+    if not found:
         raise HTTPException(status_code=404, detail="Job not found")
+    await bump_collection_version(current_user["company_id"], "jobs")
     
     return {"message": "Job status updated successfully"}
 
+@api_router.get("/jobs/{job_id}/notes", response_model=JobNotesPage)
+async def get_job_notes(
+    job_id: str,
+    limit: int = Query(JOB_NOTES_PAGE_SIZE, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a job's notes and photos, newest first."""
+    company_id = current_user["company_id"]
+    if not await db.jobs.find_one({"id": job_id, "company_id": company_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    filter_dict = {"job_id": job_id, "company_id": company_id}
+    if cursor:
+        created_at, note_id = decode_note_cursor(cursor)
+        filter_dict["$or"] = [{"created_at": {"$lt": created_at}}, {"created_at": created_at, "id": {"$lt": note_id}}]
+    notes = await db.job_notes.find(filter_dict, model_projection(JobNote)).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    next_cursor = encode_note_cursor(notes[limit - 1]) if len(notes) > limit else None
+    return ORJSONResponse({"notes": fill_model_defaults(notes[:limit], JobNote), "next_cursor": next_cursor})
+
 # Invoice Routes
 @api_router.post("/invoices", response_model=Invoice)
 async def create_invoice(invoice_data: InvoiceCreate, current_user: dict = Depends(get_current_user)):
@@ -548,16 +1986,27 @@ async def create_invoice(invoice_data: InvoiceCreate, current_user: dict = Depen
     )
     
     await db.invoices.insert_one(invoice.dict())
+    await bump_collection_version(current_user["company_id"], "invoices")
     return invoice
 
 @api_router.get("/invoices", response_model=List[Invoice])
-async def get_invoices(current_user: dict = Depends(get_current_user)):
+async def get_invoices(
+    fields: Optional[List[str]] = Depends(sparse_fields(Invoice)),
+    etag: str = Depends(collection_etag("invoices")),
+    current_user: dict = Depends(get_current_user)
+):
     """Get all invoices for current company."""
-    invoices = await db.invoices.find({"company_id": current_user["company_id"]}).to_list(1000)
-    return invoices
+    invoices = await db.invoices.find({"company_id": current_user["company_id"]}, model_projection(Invoice, fields)).to_list(1000)
+    return trusted_response(invoices, Invoice, fields, headers=etag_headers(etag))
 
 def generate_invoice_pdf(invoice: dict, company: dict, client: dict, jobs: List[dict]) -> io.BytesIO:
     """Generate PDF for an invoice."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, 
                            topMargin=72, bottomMargin=18)
@@ -757,11 +2206,12 @@ async def update_invoice_status(
     
     result = await db.invoices.update_one(
         {"id": invoice_id, "company_id": current_user["company_id"]},
-        {"$set": {"status": status, "paid_date": datetime.utcnow() if status == "paid" else None}}
+        {"$set": {"status": status, "paid_date": datetime.utcnow() if status == "paid" else None, "updated_at": datetime.utcnow()}}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    await bump_collection_version(current_user["company_id"], "invoices")
     
     return {"message": "Invoice status updated successfully"}
 
@@ -816,18 +2266,377 @@ async def get_recent_jobs(current_user: dict = Depends(get_current_user)):
     """Get recent jobs for dashboard."""
     jobs = await db.jobs.find(
         {"company_id": current_user["company_id"]},
+        model_projection(Job),
         sort=[("scheduled_date", -1)]
     ).limit(5).to_list(5)
     
     # Add client names
     for job in jobs:
-        client = await db.clients.find_one({"id": job["client_id"]})
+        client = await db.clients.find_one({"id": job["client_id"]}, {"_id": 0, "name": 1})
         job["client_name"] = client["name"] if client else "Unknown"
     
     return jobs
 
+# Search Routes
+SEARCH_LIMIT_PER_TYPE = 10
+SEARCH_MAX_TIME_MS = int(os.environ.get('SEARCH_MAX_TIME_MS', '50'))  # the search latency target
+SEARCH_PREFIX_BONUS = 20.0  # ranks prefix matches above text matches, which score roughly 1-15
+SEARCH_TYPES = {  # type -> (collection, title field, fields returned, prefix-indexed field, phone digits field)
+    "client": ("clients", "name", ["email", "phone"], "name", "phone_digits"),
+    "job": ("jobs", "title", ["status", "scheduled_date", "client_id"], None, None),
+    "invoice": ("invoices", "invoice_number", ["status", "total_amount", "client_id"], "invoice_number", None),
+}
+
+async def search_type(kind: str, company_id: str, q: str, limit: int) -> List[dict]:
+    """Top matches of one type: text index matches by textScore, boosted when the title starts with q.
+
+    A q that looks like a phone number is matched by its digits against the phone digits field
+    instead of the title, so "5559990000" finds "(555) 999-0000".
+    """
+    collection, title_field, fields, prefix_field, digits_field = SEARCH_TYPES[kind]
+    projection = {"_id": 0, "id": 1, title_field: 1, **{field: 1 for field in fields}}
+    queries = [
+        db[collection].find(
+            {"company_id": company_id, "$text": {"$search": q}},
+            {**projection, "score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(limit).max_time_ms(SEARCH_MAX_TIME_MS).to_list(limit)
+    ]
+    if digits_field and looks_like_phone(q):
+        digits = phone_digits(q)
+        queries.append(db[collection].find(
+            {"company_id": company_id, digits_field: {"$gte": digits, "$lt": digits + "\uffff"}}, projection
+        ).sort(digits_field, 1).limit(limit).max_time_ms(SEARCH_MAX_TIME_MS).to_list(limit))
+    elif prefix_field:
+        queries.append(db[collection].find(
+            {"company_id": company_id, prefix_field: {"$gte": q, "$lt": q + "\uffff"}},
+            projection, collation=SEARCH_COLLATION
+        ).sort(prefix_field, 1).limit(limit).max_time_ms(SEARCH_MAX_TIME_MS).to_list(limit))
+    text_matches, *prefix_matches = await asyncio.gather(*queries)
+
+    ranked = {doc["id"]: (doc.pop("score"), doc) for doc in text_matches}
+    for doc in prefix_matches[0] if prefix_matches else []:
+        ranked[doc["id"]] = (ranked.get(doc["id"], (0.0, doc))[0] + SEARCH_PREFIX_BONUS, doc)
+    best = sorted(ranked.values(), key=lambda match: match[0], reverse=True)[:limit]
+    return [
+        {"type": kind, "id": doc["id"], "title": doc.get(title_field), "score": round(score, 3),
+         "fields": {field: doc.get(field) for field in fields}}
+        for score, doc in best
+    ]
+
+@api_router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=100),
+    types: Optional[str] = Query(None, description="Comma-separated subset of client, job, invoice"),
+    limit: int = Query(SEARCH_LIMIT_PER_TYPE, ge=1, le=50, description="Results per type"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Search clients, jobs and invoices, returning typed results ranked by relevance."""
+    kinds = [kind.strip() for kind in types.split(",") if kind.strip()] if types else list(SEARCH_TYPES)
+    unknown = [kind for kind in kinds if kind not in SEARCH_TYPES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown types: {', '.join(unknown)}. Available: {', '.join(SEARCH_TYPES)}")
+    
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query must not be blank")
+    outcomes = await asyncio.gather(
+        *(search_type(kind, current_user["company_id"], q, limit) for kind in kinds), return_exceptions=True
+    )
+    results, timed_out = [], []
+    for kind, outcome in zip(kinds, outcomes):
+        if isinstance(outcome, ExecutionTimeout):
+            timed_out.append(kind)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        else:
+            results.extend(outcome)
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return {"query": q, "results": results, "timed_out": timed_out}
+
+# Analytics Cache
+ANALYTICS_CACHE_MAX_BYTES = int(os.environ.get('ANALYTICS_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+ANALYTICS_CACHE_RECHECK_SECONDS = float(os.environ.get('ANALYTICS_CACHE_RECHECK_SECONDS', '5'))
+ANALYTICS_JOB_FIELDS = [
+    "id", "status", "service_type", "priority", "scheduled_date",
+    "estimated_duration", "actual_duration", "estimated_cost", "actual_cost", "updated_at"
+]
+
+class JobAnalyticsCache:
+    """Per-tenant columnar job data for the analytics endpoints.
+
+    Each tenant's jobs are loaded once into a DataFrame indexed by job id. A hit is served
+    as-is while the tenant's jobs collection version is unchanged, checking the version at
+    most every recheck_seconds. Once it moves, only jobs whose updated_at moved past the
+    tenant's watermark are re-read. Least recently used tenants are evicted once the total
+    size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int, recheck_seconds: float = ANALYTICS_CACHE_RECHECK_SECONDS):
+        self.max_bytes = max_bytes
+        self.recheck_seconds = recheck_seconds
+        self.frames = OrderedDict()  # company_id -> {"frame", "watermark", "nbytes", "version", "checked_at"}
+        self.locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["nbytes"] for entry in self.frames.values())
+
+    async def get(self, company_id: str) -> "pd.DataFrame":
+        import pandas as pd
+        entry = self.frames.get(company_id)
+        if entry is not None and time.monotonic() - entry["checked_at"] < self.recheck_seconds:
+            self.hits += 1
+            self.frames.move_to_end(company_id)
+            return entry["frame"]
+        lock = self.locks.setdefault(company_id, asyncio.Lock())
+        async with lock:
+            version = await get_collection_version(company_id, "jobs")
+            entry = self.frames.get(company_id)
+            if entry is None:
+                self.misses += 1
+                frame, watermark = await self._load({"company_id": company_id})
+            else:
+                self.hits += 1
+                frame, watermark = entry["frame"], entry["watermark"]
+                if entry["version"] != version:
+                    changed, changed_watermark = await self._load(
+                        {"company_id": company_id, "updated_at": {"$gte": watermark}}
+                    )
+                    if len(changed):
+                        frame = pd.concat([frame.drop(changed.index, errors="ignore"), changed]).astype(
+                            {"status": "category", "service_type": "category", "priority": "category"}
+                        )
+                        watermark = max(watermark, changed_watermark)
+                    # Deletes leave no updated_at trail, so rebuild when the row counts drift
+                    if len(frame) != await analytics_db().jobs.count_documents({"company_id": company_id}):
+                        frame, watermark = await self._load({"company_id": company_id})
+            self._store(company_id, frame, watermark, version)
+            return frame
+
+    def invalidate(self, company_id: str):
+        self.frames.pop(company_id, None)
+
+    def expire(self, company_id: str):
+        """Check the version on the next get; called after this worker writes the tenant's jobs."""
+        entry = self.frames.get(company_id)
+        if entry is not None:
+            entry["checked_at"] = float("-inf")
+
+    def _store(self, company_id: str, frame: "pd.DataFrame", watermark: datetime, version: int):
+        entry = self.frames.get(company_id)
+        nbytes = entry["nbytes"] if entry is not None and entry["frame"] is frame else int(frame.memory_usage(deep=True).sum())
+        self.frames[company_id] = {
+            "frame": frame, "watermark": watermark, "nbytes": nbytes, "version": version, "checked_at": time.monotonic()
+        }
+        self.frames.move_to_end(company_id)
+        while len(self.frames) > 1 and self.total_bytes > self.max_bytes:
+            evicted, _ = self.frames.popitem(last=False)
+            lock = self.locks.get(evicted)
+            if lock is not None and not lock.locked():
+                del self.locks[evicted]
+
+    async def _load(self, filter_dict: dict):
+        """Read matching jobs through one projected cursor into a columnar frame."""
+        import pandas as pd
+        columns = {field: [] for field in ANALYTICS_JOB_FIELDS}
+        async for job in analytics_db().jobs.find(filter_dict, {"_id": 0, **{field: 1 for field in ANALYTICS_JOB_FIELDS}}):
+            for field, values in columns.items():
+                values.append(job.get(field))
+
+        raw = pd.DataFrame(columns)
+        frame = pd.DataFrame({
+            "status": raw["status"].fillna("unknown").astype("category"),
+            "service_type": raw["service_type"].fillna("Other").astype("category"),
+            "priority": raw["priority"].fillna("medium").astype("category"),
+            "scheduled_date": parse_datetime_column(raw["scheduled_date"]),
+            "estimated_duration": pd.to_numeric(raw["estimated_duration"]).fillna(0),
+            "cost": pd.to_numeric(raw["actual_cost"]).fillna(pd.to_numeric(raw["estimated_cost"])).fillna(0.0),
+            # Until actual durations are recorded everywhere, fall back to the estimate with the
+            # same per-job variance the duration report has always used.
+            "duration": pd.to_numeric(raw["actual_duration"]).fillna(
+                pd.to_numeric(raw["estimated_duration"]).fillna(0) * (0.8 + 0.4 * raw["id"].map(hash) % 100 / 100)
+            ),
+        })
+        frame.index = pd.Index(raw["id"], name="id")
+
+        updated_at = parse_datetime_column(raw["updated_at"])
+        watermark = updated_at.max() if len(updated_at) else pd.NaT
+        return frame, (datetime.min if pd.isna(watermark) else watermark.to_pydatetime())
+
+job_analytics_cache = JobAnalyticsCache(ANALYTICS_CACHE_MAX_BYTES)
+instrumented_caches["analytics_jobs"] = job_analytics_cache
+
+def parse_datetime_column(values: "pd.Series") -> "pd.Series":
+    """Vectorized conversion of BSON dates or legacy ISO strings to naive UTC datetimes."""
+    import pandas as pd
+    return pd.to_datetime(values, utc=True, format="mixed", errors="coerce").dt.tz_localize(None)
+
+def value_counts_dict(values: "pd.Series") -> Dict[str, int]:
+    """Category counts as a plain dict, skipping unused categories."""
+    counts = values.value_counts()
+    return {str(k): int(v) for k, v in counts[counts > 0].items()}
+
+# Analytics Response Cache
+# Whole analytics responses, stored as rendered JSON under (company_id, endpoint, params) plus the
+# tenant's jobs/invoices/clients versions, so any write to those collections makes the old entry
+# unreachable on every worker. Fresh entries are served as-is; entries past the TTL but inside the
+# stale window are served while a single background task recomputes them.
+ANALYTICS_RESPONSE_TTL = float(os.environ.get('ANALYTICS_RESPONSE_TTL', '300'))
+ANALYTICS_RESPONSE_STALE_TTL = float(os.environ.get('ANALYTICS_RESPONSE_STALE_TTL', '3600'))
+ANALYTICS_RESPONSE_MAX_ENTRIES = int(os.environ.get('ANALYTICS_RESPONSE_MAX_ENTRIES', '10000'))
+ANALYTICS_RESPONSE_BACKEND = os.environ.get('ANALYTICS_RESPONSE_BACKEND', 'memory')  # memory, mongo
+ANALYTICS_SOURCE_COLLECTIONS = ["jobs", "invoices", "clients"]
+
+class MemoryResponseBackend:
+    """Entries in this worker's memory, evicting the least recently used past max_entries."""
+
+    def __init__(self, max_entries: int = ANALYTICS_RESPONSE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (company_id, body, created_at)
+
+    async def get(self, key: str):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    async def set(self, key: str, company_id: str, body: bytes, created_at: float):
+        self.entries[key] = (company_id, body, created_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def invalidate(self, company_id: str):
+        for key in [key for key, entry in self.entries.items() if entry[0] == company_id]:
+            del self.entries[key]
+
+class MongoResponseBackend:
+    """Entries in a MongoDB collection shared by every worker; a TTL index removes expired ones."""
+
+    def __init__(self, collection: str = "analytics_response_cache"):
+        self.collection = collection
+
+    async def get(self, key: str):
+        doc = await db[self.collection].find_one({"_id": key}, {"body": 1, "created_at": 1})
+        return (bytes(doc["body"]), doc["created_at"]) if doc else None
+
+    async def set(self, key: str, company_id: str, body: bytes, created_at: float):
+        expires_at = datetime.utcfromtimestamp(created_at + ANALYTICS_RESPONSE_TTL + ANALYTICS_RESPONSE_STALE_TTL)
+        await db[self.collection].replace_one(
+            {"_id": key},
+            {"company_id": company_id, "body": body, "created_at": created_at, "expires_at": expires_at},
+            upsert=True
+        )
+
+    async def invalidate(self, company_id: str):
+        await db[self.collection].delete_many({"company_id": company_id})
+
+RESPONSE_CACHE_BACKENDS = {"memory": MemoryResponseBackend, "mongo": MongoResponseBackend}
+
+class AnalyticsResponseCache:
+    """Stale-while-revalidate cache of rendered analytics responses in front of a pluggable backend."""
+
+    def __init__(self, backend, ttl: float = ANALYTICS_RESPONSE_TTL, stale_ttl: float = ANALYTICS_RESPONSE_STALE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refreshing: Dict[str, asyncio.Task] = {}
+        self.computing: Dict[str, asyncio.Future] = {}  # misses in flight; concurrent misses await the same one
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def respond(self, company_id: str, endpoint: str, params: Dict[str, Any], compute) -> Response:
+        versions = await get_collection_versions(company_id, ANALYTICS_SOURCE_COLLECTIONS)
+        key = json.dumps([company_id, endpoint, params, versions], sort_keys=True, default=str)
+        entry = await self.backend.get(key)
+        age = time.time() - entry[1] if entry else None
+        if entry is None or age > self.ttl + self.stale_ttl:
+            self.misses += 1
+            body, result = await self._compute_once(key, company_id, compute), "miss"
+        elif age > self.ttl:
+            self.hits += 1
+            self.stale_hits += 1
+            body, result = entry[0], "stale"
+            if key not in self.refreshing:
+                self.refreshing[key] = asyncio.create_task(self._refresh(key, company_id, compute))
+        else:
+            self.hits += 1
+            body, result = entry[0], "hit"
+        return Response(body, media_type="application/json", headers={"X-Cache": result})
+
+    async def invalidate(self, company_id: str):
+        await self.backend.invalidate(company_id)
+
+    async def _compute(self, key: str, company_id: str, compute) -> bytes:
+        token = analytics_primary_reads.set(True)
+        try:
+            body = ORJSONResponse(await compute()).body
+        finally:
+            analytics_primary_reads.reset(token)
+        await self.backend.set(key, company_id, body, time.time())
+        return body
+
+    async def _compute_once(self, key: str, company_id: str, compute) -> bytes:
+        """Compute a missing entry, sharing one computation between concurrent misses on the key."""
+        while True:
+            pending = self.computing.get(key)
+            if pending is None:
+                break
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # this request was cancelled, not the computation
+                # The request computing it went away; the next waiter takes over
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())  # no "never retrieved" warning
+        self.computing[key] = future
+        try:
+            body = await self._compute(key, company_id, compute)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(body)
+            return body
+        finally:
+            self.computing.pop(key, None)
+
+    async def _refresh(self, key: str, company_id: str, compute):
+        try:
+            await self._compute(key, company_id, compute)
+        except Exception:
+            logger.exception("Refreshing cached analytics response %s failed", key)
+        finally:
+            self.refreshing.pop(key, None)
+
+analytics_response_cache = AnalyticsResponseCache(RESPONSE_CACHE_BACKENDS[ANALYTICS_RESPONSE_BACKEND]())
+instrumented_caches["analytics_responses"] = analytics_response_cache
+
+def cached_analytics(endpoint: str):
+    """Serve an analytics route through analytics_response_cache, keyed by its non-user parameters."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            current_user = kwargs["current_user"]
+            params = {name: value for name, value in kwargs.items() if name != "current_user"}
+            return await analytics_response_cache.respond(
+                current_user["company_id"], endpoint, params, lambda: func(**kwargs)
+            )
+        return wrapper
+    return decorator
+
 # Analytics Routes
 @api_router.get("/analytics/revenue")
+@cached_analytics("revenue")
 async def get_revenue_analytics(
     period: str = "monthly",  # monthly, quarterly, yearly
     current_user: dict = Depends(get_current_user)
@@ -874,7 +2683,7 @@ async def get_revenue_analytics(
     revenue_data = []
     for period_info in periods:
         # Get completed jobs in this period
-        jobs = await db.jobs.find({
+        jobs = await analytics_db().jobs.find({
             "company_id": current_user["company_id"],
             "status": "completed",
             "scheduled_date": {
@@ -896,67 +2705,43 @@ async def get_revenue_analytics(
     }
 
 @api_router.get("/analytics/jobs")
+@cached_analytics("jobs")
 async def get_job_analytics(current_user: dict = Depends(get_current_user)):
     """Get job performance analytics."""
-    # Get all jobs
-    jobs = await db.jobs.find({"company_id": current_user["company_id"]}).to_list(10000)
-    
-    # Status distribution
-    status_counts = {}
-    for job in jobs:
-        status = job.get('status', 'unknown')
-        status_counts[status] = status_counts.get(status, 0) + 1
-    
-    # Service type distribution
-    service_counts = {}
-    service_revenue = {}
-    for job in jobs:
-        service = job.get('service_type', 'Other')
-        service_counts[service] = service_counts.get(service, 0) + 1
-        
-        if job.get('status') == 'completed':
-            cost = job.get("actual_cost", job.get("estimated_cost", 0))
-            service_revenue[service] = service_revenue.get(service, 0) + cost
-    
-    # Priority distribution
-    priority_counts = {}
-    for job in jobs:
-        priority = job.get('priority', 'medium')
-        priority_counts[priority] = priority_counts.get(priority, 0) + 1
+    import pandas as pd
+    jobs = await job_analytics_cache.get(current_user["company_id"])
+    completed = jobs[jobs["status"] == "completed"]
     
     # Average duration vs estimated
-    duration_analysis = []
-    for job in jobs:
-        if job.get('status') == 'completed' and job.get('estimated_duration'):
-            estimated = job.get('estimated_duration', 0)
-            # For now, we'll assume actual duration = estimated + random variance
-            # In a real system, you'd track actual duration
-            actual = estimated * (0.8 + 0.4 * hash(job['id']) % 100 / 100)
-            duration_analysis.append({
-                'estimated': estimated,
-                'actual': actual,
-                'variance': actual - estimated
-            })
+    timed = completed[completed["estimated_duration"] > 0]
+    duration_analysis = pd.DataFrame({
+        'estimated': timed["estimated_duration"],
+        'actual': timed["duration"],
+        'variance': timed["duration"] - timed["estimated_duration"]
+    }).to_dict('records')
+    
+    service_revenue = completed.groupby("service_type", observed=True)["cost"].sum()
     
     return {
-        'status_distribution': status_counts,
-        'service_type_distribution': service_counts,
-        'service_type_revenue': service_revenue,
-        'priority_distribution': priority_counts,
+        'status_distribution': value_counts_dict(jobs["status"]),
+        'service_type_distribution': value_counts_dict(jobs["service_type"]),
+        'service_type_revenue': {str(k): float(v) for k, v in service_revenue.items()},
+        'priority_distribution': value_counts_dict(jobs["priority"]),
         'duration_analysis': duration_analysis,
         'total_jobs': len(jobs)
     }
 
 @api_router.get("/analytics/clients")
+@cached_analytics("clients")
 async def get_client_analytics(current_user: dict = Depends(get_current_user)):
     """Get client analytics data."""
     # Get all clients and their jobs
-    clients = await db.clients.find({"company_id": current_user["company_id"]}).to_list(1000)
+    clients = await analytics_db().clients.find({"company_id": current_user["company_id"]}).to_list(1000)
     
     client_analytics = []
     for client in clients:
         # Get jobs for this client
-        jobs = await db.jobs.find({
+        jobs = await analytics_db().jobs.find({
             "company_id": current_user["company_id"],
             "client_id": client["id"]
         }).to_list(1000)
@@ -970,7 +2755,7 @@ async def get_client_analytics(current_user: dict = Depends(get_current_user)):
         )
         
         # Get invoices for this client
-        invoices = await db.invoices.find({
+        invoices = await analytics_db().invoices.find({
             "company_id": current_user["company_id"],
             "client_id": client["id"]
         }).to_list(1000)
@@ -1007,52 +2792,56 @@ async def get_client_analytics(current_user: dict = Depends(get_current_user)):
     }
 
 @api_router.get("/analytics/business-insights")
+@cached_analytics("business-insights")
 async def get_business_insights(current_user: dict = Depends(get_current_user)):
     """Get business insights and KPIs."""
     now = datetime.utcnow()
     last_month = now - timedelta(days=30)
     last_year = now - timedelta(days=365)
     
-    # Get data for calculations
-    all_jobs = await db.jobs.find({"company_id": current_user["company_id"]}).to_list(10000)
-    recent_jobs = [j for j in all_jobs if datetime.fromisoformat(j['scheduled_date'].replace('Z', '+00:00')) >= last_month]
-    yearly_jobs = [j for j in all_jobs if datetime.fromisoformat(j['scheduled_date'].replace('Z', '+00:00')) >= last_year]
-    
-    all_invoices = await db.invoices.find({"company_id": current_user["company_id"]}).to_list(10000)
-    recent_invoices = [inv for inv in all_invoices if datetime.fromisoformat(inv['due_date'].replace('Z', '+00:00')) >= last_month]
+    # 30- and 365-day windows, aggregated in Mongo over the (company_id, scheduled_date) index
+    cost = {"$ifNull": ["$actual_cost", {"$ifNull": ["$estimated_cost", 0]}]}
+    completed = {"$eq": ["$status", "completed"]}
+    recent = {"$gte": ["$scheduled_date", last_month]}
+    windows = await analytics_db().jobs.aggregate([
+        {"$match": {"company_id": current_user["company_id"], "scheduled_date": {"$gte": last_year}}},
+        {"$group": {
+            "_id": None,
+            "yearly_revenue": {"$sum": {"$cond": [completed, cost, 0]}},
+            "recent_count": {"$sum": {"$cond": [recent, 1, 0]}},
+            "recent_completed": {"$sum": {"$cond": [{"$and": [recent, completed]}, 1, 0]}},
+            "recent_revenue": {"$sum": {"$cond": [{"$and": [recent, completed]}, cost, 0]}},
+        }}
+    ]).to_list(1)
+    windows = windows[0] if windows else {}
+    jobs_this_month = windows.get("recent_count", 0)
+    completed_this_month = windows.get("recent_completed", 0)
     
     # Revenue trends
-    current_month_revenue = sum(
-        job.get("actual_cost", job.get("estimated_cost", 0)) 
-        for job in recent_jobs if job.get('status') == 'completed'
-    )
-    
-    yearly_revenue = sum(
-        job.get("actual_cost", job.get("estimated_cost", 0)) 
-        for job in yearly_jobs if job.get('status') == 'completed'
-    )
+    current_month_revenue = float(windows.get("recent_revenue", 0))
+    yearly_revenue = float(windows.get("yearly_revenue", 0))
     
     # Growth calculations (simplified)
     avg_monthly_revenue = yearly_revenue / 12 if yearly_revenue > 0 else 0
     revenue_growth = ((current_month_revenue - avg_monthly_revenue) / avg_monthly_revenue * 100) if avg_monthly_revenue > 0 else 0
     
-    # Payment insights
-    overdue_invoices = [inv for inv in all_invoices if inv.get('status') == 'overdue']
-    outstanding_amount = sum(inv.get('total_amount', 0) for inv in overdue_invoices)
-    
-    # Top service types
-    service_performance = {}
-    for job in all_jobs:
-        if job.get('status') == 'completed':
-            service = job.get('service_type', 'Other')
-            revenue = job.get("actual_cost", job.get("estimated_cost", 0))
-            if service in service_performance:
-                service_performance[service]['revenue'] += revenue
-                service_performance[service]['count'] += 1
-            else:
-                service_performance[service] = {'revenue': revenue, 'count': 1}
-    
-    top_services = sorted(service_performance.items(), key=lambda x: x[1]['revenue'], reverse=True)[:5]
+    # Payment insights, aggregated in Mongo over the (company_id, status) index
+    overdue = await analytics_db().invoices.aggregate([
+        {"$match": {"company_id": current_user["company_id"], "status": "overdue"}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "amount": {"$sum": "$total_amount"}}}
+    ]).to_list(1)
+    overdue_invoices_count = overdue[0]["count"] if overdue else 0
+    outstanding_amount = overdue[0]["amount"] if overdue else 0
+    
+    # Top service types over all completed jobs, from the tenant's cached frame
+    all_jobs = await job_analytics_cache.get(current_user["company_id"])
+    top_services = (
+        all_jobs[all_jobs["status"] == "completed"]
+        .groupby("service_type", observed=True)["cost"]
+        .agg(revenue="sum", count="count")
+        .sort_values("revenue", ascending=False)
+        .head(5)
+    )
     
     return {
         'revenue_metrics': {
@@ -1062,16 +2851,19 @@ async def get_business_insights(current_user: dict = Depends(get_current_user)):
             'growth_rate': round(revenue_growth, 1)
         },
         'payment_insights': {
-            'overdue_invoices_count': len(overdue_invoices),
+            'overdue_invoices_count': overdue_invoices_count,
             'outstanding_amount': outstanding_amount,
             'average_payment_time': 15  # Placeholder - would need actual payment date tracking
         },
         'operational_metrics': {
-            'jobs_this_month': len(recent_jobs),
-            'completion_rate': round(len([j for j in recent_jobs if j.get('status') == 'completed']) / len(recent_jobs) * 100) if recent_jobs else 0,
-            'average_job_value': round(current_month_revenue / len([j for j in recent_jobs if j.get('status') == 'completed'])) if recent_jobs else 0
+            'jobs_this_month': jobs_this_month,
+            'completion_rate': round(completed_this_month / jobs_this_month * 100) if jobs_this_month else 0,
+            'average_job_value': round(current_month_revenue / completed_this_month) if completed_this_month else 0
         },
-        'top_services': [{'name': name, 'revenue': data['revenue'], 'count': data['count']} for name, data in top_services]
+        'top_services': [
+            {'name': str(name), 'revenue': float(row['revenue']), 'count': int(row['count'])}
+            for name, row in top_services.iterrows()
+        ]
     }
 
 # File upload route
@@ -1079,6 +2871,7 @@ async def get_business_insights(current_user: dict = Depends(get_current_user)):
 async def upload_job_photo(
     job_id: str,
     file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user: dict = Depends(get_current_user)
 ):
     """Upload photo for a job."""
@@ -1100,11 +2893,16 @@ async def upload_job_photo(
         content = await file.read()
         buffer.write(content)
     
-    # Update job with photo reference
-    await db.jobs.update_one(
-        {"id": job_id, "company_id": current_user["company_id"]},
-        {"$push": {"photos": str(file_path)}, "$set": {"updated_at": datetime.utcnow()}}
-    )
+    # Record the photo as a job note and count it on the job
+    now = datetime.utcnow()
+    note = JobNote(
+        id=job_note_id(f"{current_user['company_id']}:{current_user['id']}", idempotency_key),
+        job_id=job_id, company_id=current_user["company_id"], kind="photo", photo_path=str(file_path),
+        created_by=current_user["full_name"], created_at=now
+    ).dict()
+    if not await record_job_note(note, {"$set": {"updated_at": now}}):
+        raise HTTPException(status_code=404, detail="Job not found")
+    await bump_collection_version(current_user["company_id"], "jobs")
     
     return {"message": "Photo uploaded successfully", "filename": filename}
 
@@ -1129,25 +2927,32 @@ async def create_technician(technician_data: TechnicianCreate, current_user: dic
     return technician
 
 @api_router.get("/technicians", response_model=List[Technician])
-async def get_technicians(current_user: dict = Depends(get_current_user)):
+async def get_technicians(
+    fields: Optional[List[str]] = Depends(sparse_fields(Technician)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get all technicians for current company."""
     technicians = await db.users.find({
         "company_id": current_user["company_id"], 
         "role": "technician"
-    }).to_list(1000)
-    return technicians
+    }, model_projection(Technician, fields)).to_list(1000)
+    return trusted_response(technicians, Technician, fields)
 
 @api_router.get("/technicians/{technician_id}", response_model=Technician)
-async def get_technician(technician_id: str, current_user: dict = Depends(get_current_user)):
+async def get_technician(
+    technician_id: str,
+    fields: Optional[List[str]] = Depends(sparse_fields(Technician)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get specific technician."""
     technician = await db.users.find_one({
         "id": technician_id, 
         "company_id": current_user["company_id"], 
         "role": "technician"
-    })
+    }, model_projection(Technician, fields))
     if not technician:
         raise HTTPException(status_code=404, detail="Technician not found")
-    return technician
+    return trusted_response(technician, Technician, fields)
 
 @api_router.put("/technicians/{technician_id}", response_model=Technician)
 async def update_technician(
@@ -1230,6 +3035,7 @@ async def get_time_entries(
     technician_id: Optional[str] = None,
     date_from: Optional[datetime] = None,
     date_to: Optional[datetime] = None,
+    fields: Optional[List[str]] = Depends(sparse_fields(TimeEntry)),
     current_user: dict = Depends(get_current_user)
 ):
     """Get time entries with optional filtering."""
@@ -1247,18 +3053,23 @@ async def get_time_entries(
             date_filter["$lte"] = date_to
         filter_dict["start_time"] = date_filter
     
-    time_entries = await db.time_entries.find(filter_dict).sort("start_time", -1).to_list(1000)
-    return time_entries
+    time_entries = await db.time_entries.find(filter_dict, model_projection(TimeEntry, fields)).sort("start_time", -1).to_list(1000)
+    return trusted_response(time_entries, TimeEntry, fields)
 
 @api_router.get("/time-entries/active", response_model=Optional[TimeEntry])
-async def get_active_time_entry(current_user: dict = Depends(get_current_user)):
+async def get_active_time_entry(
+    fields: Optional[List[str]] = Depends(sparse_fields(TimeEntry)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get current user's active time entry."""
     active_entry = await db.time_entries.find_one({
         "technician_id": current_user["id"],
         "end_time": None,
         "company_id": current_user["company_id"]
-    })
-    return active_entry
+    }, model_projection(TimeEntry, fields))
+    if active_entry is None:
+        return None
+    return trusted_response(active_entry, TimeEntry, fields)
 
 # Notification Routes
 @api_router.post("/notifications", response_model=Notification)
@@ -1271,6 +3082,7 @@ async def create_notification(notification_data: NotificationCreate, current_use
 @api_router.get("/notifications", response_model=List[Notification])
 async def get_notifications(
     unread_only: bool = False,
+    fields: Optional[List[str]] = Depends(sparse_fields(Notification)),
     current_user: dict = Depends(get_current_user)
 ):
     """Get notifications for current user."""
@@ -1278,8 +3090,8 @@ async def get_notifications(
     if unread_only:
         filter_dict["is_read"] = False
     
-    notifications = await db.notifications.find(filter_dict).sort("created_at", -1).to_list(100)
-    return notifications
+    notifications = await db.notifications.find(filter_dict, model_projection(Notification, fields)).sort("created_at", -1).to_list(100)
+    return trusted_response(notifications, Notification, fields)
 
 @api_router.put("/notifications/{notification_id}/read")
 async def mark_notification_read(notification_id: str, current_user: dict = Depends(get_current_user)):
@@ -1312,18 +3124,25 @@ async def create_custom_form(form_data: CustomFormCreate, current_user: dict = D
     return form
 
 @api_router.get("/forms", response_model=List[CustomForm])
-async def get_custom_forms(current_user: dict = Depends(get_current_user)):
+async def get_custom_forms(
+    fields: Optional[List[str]] = Depends(sparse_fields(CustomForm)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get all custom forms for current company."""
-    forms = await db.custom_forms.find({"company_id": current_user["company_id"]}).to_list(100)
-    return forms
+    forms = await db.custom_forms.find({"company_id": current_user["company_id"]}, model_projection(CustomForm, fields)).to_list(100)
+    return trusted_response(forms, CustomForm, fields)
 
 @api_router.get("/forms/{form_id}", response_model=CustomForm)
-async def get_custom_form(form_id: str, current_user: dict = Depends(get_current_user)):
+async def get_custom_form(
+    form_id: str,
+    fields: Optional[List[str]] = Depends(sparse_fields(CustomForm)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get specific custom form."""
-    form = await db.custom_forms.find_one({"id": form_id, "company_id": current_user["company_id"]})
+    form = await db.custom_forms.find_one({"id": form_id, "company_id": current_user["company_id"]}, model_projection(CustomForm, fields))
     if not form:
         raise HTTPException(status_code=404, detail="Form not found")
-    return form
+    return trusted_response(form, CustomForm, fields)
 
 @api_router.post("/forms/{form_id}/submissions", response_model=FormSubmission)
 async def submit_form(
@@ -1354,17 +3173,25 @@ async def submit_form(
     return submission
 
 @api_router.get("/forms/{form_id}/submissions", response_model=List[FormSubmission])
-async def get_form_submissions(form_id: str, current_user: dict = Depends(get_current_user)):
+async def get_form_submissions(
+    form_id: str,
+    fields: Optional[List[str]] = Depends(sparse_fields(FormSubmission)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get all submissions for a form."""
     submissions = await db.form_submissions.find({
         "form_id": form_id, 
         "company_id": current_user["company_id"]
-    }).to_list(1000)
-    return submissions
+    }, model_projection(FormSubmission, fields)).to_list(1000)
+    return trusted_response(submissions, FormSubmission, fields)
 
 # Enhanced Job Routes with Time Tracking
 @api_router.get("/jobs/{job_id}/time-entries", response_model=List[TimeEntry])
-async def get_job_time_entries(job_id: str, current_user: dict = Depends(get_current_user)):
+async def get_job_time_entries(
+    job_id: str,
+    fields: Optional[List[str]] = Depends(sparse_fields(TimeEntry)),
+    current_user: dict = Depends(get_current_user)
+):
     """Get all time entries for a specific job."""
     # Verify job exists
     job = await db.jobs.find_one({"id": job_id, "company_id": current_user["company_id"]})
@@ -1374,9 +3201,9 @@ async def get_job_time_entries(job_id: str, current_user: dict = Depends(get_cur
     time_entries = await db.time_entries.find({
         "job_id": job_id,
         "company_id": current_user["company_id"]
-    }).to_list(1000)
+    }, model_projection(TimeEntry, fields)).to_list(1000)
     
-    return time_entries
+    return trusted_response(time_entries, TimeEntry, fields)
 
 @api_router.get("/jobs/{job_id}/total-time")
 async def get_job_total_time(job_id: str, current_user: dict = Depends(get_current_user)):
@@ -1417,6 +3244,348 @@ async def get_job_total_time(job_id: str, current_user: dict = Depends(get_curre
         "billable_minutes": int(billable_minutes)
     }
 
+# Delta Sync Routes
+# A sync pass walks SYNC_SOURCES in (updated_at, id) order up to a cutoff fixed when the pass
+# starts. The token carries the cutoff and each source's position, so any page can be resumed;
+# the last page of a pass returns the token for the next incremental sync.
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', '500'))
+SYNC_MAX_PAGE_SIZE = 2000
+SYNC_SETTLE_SECONDS = float(os.environ.get('SYNC_SETTLE_SECONDS', '2'))  # let in-flight writes land before the cutoff
+SYNC_SOURCES = [  # (response key, collection, model); tombstones come last
+    ("clients", "clients", Client),
+    ("jobs", "jobs", Job),
+    ("forms", "custom_forms", CustomForm),
+    ("time_entries", "time_entries", TimeEntry),
+    ("deleted", "tombstones", None),
+]
+
+async def record_tombstone(company_id: str, collection: str, doc_id: str):
+    """Remember a hard delete so delta sync can tell clients to drop the document."""
+    await db.tombstones.insert_one({
+        "company_id": company_id, "collection": collection, "id": doc_id, "updated_at": datetime.utcnow()
+    })
+
+def encode_sync_token(until: Optional[datetime], positions: Dict[str, list]) -> str:
+    state = {"until": until.isoformat() if until else None, "pos": positions}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+def decode_sync_token(token: str):
+    """Return (cutoff of the pass in progress or None, {source: (updated_at, last id or None)})."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode()))
+        until = datetime.fromisoformat(state["until"]) if state["until"] else None
+        positions = {key: (datetime.fromisoformat(ts), last_id) for key, (ts, last_id) in state["pos"].items()}
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    return until, positions
+
+def sync_filter(company_id: str, position, until: datetime) -> dict:
+    """Documents after `position` (an (updated_at, id) pair) up to the pass cutoff."""
+    updated_at, last_id = position
+    after = {"updated_at": {"$gt": updated_at, "$lte": until}}
+    if last_id is None:
+        return {"company_id": company_id, **after}
+    return {"company_id": company_id, "$or": [after, {"updated_at": updated_at, "id": {"$gt": last_id}}]}
+
+@api_router.get("/sync")
+async def sync_changes(
+    since: Optional[str] = Query(None, description="Token from a previous sync; omit for a full sync"),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=SYNC_MAX_PAGE_SIZE),
+    current_user: dict = Depends(get_current_user)
+):
+    """Jobs, clients, forms and time entries created, updated or deleted since the last sync."""
+    company_id = current_user["company_id"]
+    now = datetime.utcnow()
+    if since:
+        until, positions = decode_sync_token(since)
+        deleted_position = positions.get("deleted", (datetime.min, None))
+        if deleted_position[0] < now - timedelta(days=SYNC_TOMBSTONE_TTL_DAYS):
+            raise HTTPException(status_code=410, detail="Sync token expired; run a full sync without since")
+    else:
+        until, positions = None, {}
+    if until is None:
+        until = now - timedelta(seconds=SYNC_SETTLE_SECONDS)
+    if not since:
+        # A full sync has nothing to delete on the device
+        positions["deleted"] = (until, None)
+
+    changes = {key: [] for key, _, model in SYNC_SOURCES if model is not None}
+    deleted = {}
+    remaining = limit
+    has_more = False
+    for key, collection, model in SYNC_SOURCES:
+        position = positions.get(key, (datetime.min, None))
+        if position == (until, None):
+            continue  # finished earlier in this pass
+        projection = model_projection(model) if model else {"_id": 0, "collection": 1, "id": 1, "updated_at": 1}
+        docs = await db[collection].find(
+            sync_filter(company_id, position, until), projection
+        ).sort([("updated_at", 1), ("id", 1)]).limit(remaining).to_list(remaining)
+        if model:
+            changes[key].extend(fill_model_defaults(docs, model))
+        else:
+            for doc in docs:
+                deleted.setdefault(doc["collection"], []).append(doc["id"])
+        if len(docs) == remaining:
+            # Page is full; resume after the last document returned
+            positions[key] = (docs[-1]["updated_at"], docs[-1]["id"])
+            has_more = True
+            break
+        positions[key] = (until, None)
+        remaining -= len(docs)
+
+    serialized = {key: [position[0].isoformat(), position[1]] for key, position in positions.items()}
+    return ORJSONResponse({
+        "changes": changes,
+        "deleted": deleted,
+        "has_more": has_more,
+        "next_token": encode_sync_token(until if has_more else None, serialized),
+    })
+
+# Batch Routes
+def parse_batch_operation(operation: BatchOperation):
+    """Validate an operation's data the way its single-item endpoint does."""
+    if operation.type == "job_status":
+        if operation.data.get("status") not in JOB_STATUSES:
+            raise ValueError(f"Invalid status. Must be one of: {JOB_STATUSES}")
+        return {"status": operation.data["status"], "notes": operation.data.get("notes")}
+    if operation.type == "job_note":
+        text = operation.data.get("text")
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("Note text is required")
+        return {"text": text}
+    if operation.type == "time_entry_update":
+        return TimeEntryUpdate(**operation.data)
+    if operation.type == "form_submission":
+        return FormSubmissionCreate(**{**operation.data, "form_id": operation.target_id})
+    raise ValueError(f"Unknown operation type. Must be one of: {BATCH_OPERATION_TYPES}")
+
+async def existing_ids(collection, filter_dict: dict, ids: set) -> set:
+    if not ids:
+        return set()
+    return {doc["id"] async for doc in collection.find({**filter_dict, "id": {"$in": list(ids)}}, {"_id": 0, "id": 1})}
+
+async def apply_batch_writes(collection: str, writes: list):
+    """Run one collection's writes as an ordered bulk_write.
+
+    Returns (applied count, error or None, matched count, positions of upserted writes).
+    """
+    try:
+        result = await db[collection].bulk_write([write for _, write in writes], ordered=True)
+        return len(writes), None, result.matched_count, set(result.upserted_ids)
+    except BulkWriteError as e:
+        error = e.details["writeErrors"][0]  # ordered writes stop at the first error
+        upserted = {upsert["index"] for upsert in e.details.get("upserted", [])}
+        return error["index"], error.get("errmsg", "Write failed"), e.details.get("nMatched", 0), upserted
+
+@api_router.post("/batch", response_model=BatchResult)
+async def apply_batch(batch: BatchRequest, current_user: dict = Depends(get_current_user)):
+    """Apply queued offline operations in order with one bulk_write per collection.
+
+    Every operation is validated before anything is written. Idempotency keys are claimed
+    up front, so replaying a batch returns the first results without writing again.
+    """
+    company_id = current_user["company_id"]
+    operations = batch.operations
+    now = datetime.utcnow()
+    results: List[Optional[BatchOperationResult]] = [None] * len(operations)
+    created_ids: Dict[int, str] = {}
+
+    def finish(index: int, status_code: int, error: Optional[str] = None):
+        results[index] = BatchOperationResult(
+            idempotency_key=operations[index].idempotency_key, status_code=status_code,
+            id=created_ids.get(index), error=error
+        )
+
+    # Validate the whole batch first
+    parsed = {}
+    seen_keys = set()
+    for index, operation in enumerate(operations):
+        if operation.idempotency_key in seen_keys:
+            finish(index, 400, "Duplicate idempotency key in batch")
+            continue
+        seen_keys.add(operation.idempotency_key)
+        try:
+            parsed[index] = parse_batch_operation(operation)
+        except ValidationError as e:
+            finish(index, 422, "; ".join(err["msg"] for err in e.errors()))
+        except ValueError as e:
+            finish(index, 400, str(e))
+
+    # Claim idempotency keys; a key that is already taken was applied (or is being applied) before
+    claims = {index: f"{company_id}:{current_user['id']}:{operations[index].idempotency_key}" for index in parsed}
+    if claims:
+        try:
+            await db.idempotency_keys.insert_many(
+                [{"_id": key, "company_id": company_id, "result": None, "created_at": now} for key in claims.values()],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            claimed_indexes = list(claims)
+            if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+            duplicates = [claimed_indexes[error["index"]] for error in e.details["writeErrors"]]
+            stored = {
+                doc["_id"]: doc["result"]
+                async for doc in db.idempotency_keys.find({"_id": {"$in": [claims[i] for i in duplicates]}})
+            }
+            for index in duplicates:
+                previous = stored.get(claims.pop(index))
+                del parsed[index]
+                if previous is None:
+                    finish(index, 409, "An operation with this idempotency key is still being applied")
+                else:
+                    results[index] = BatchOperationResult(**{**previous, "replayed": True})
+
+    try:
+        # Resolve every referenced document with one query per collection
+        job_ids, entry_ids, form_ids = set(), set(), set()
+        for index, payload in parsed.items():
+            operation = operations[index]
+            if operation.type == "time_entry_update":
+                entry_ids.add(operation.target_id)
+            elif operation.type == "form_submission":
+                form_ids.add(operation.target_id)
+                job_ids.add(payload.job_id)
+            else:
+                job_ids.add(operation.target_id)
+        jobs_found, entries_found, forms_found = await asyncio.gather(
+            existing_ids(db.jobs, {"company_id": company_id}, job_ids),
+            existing_ids(db.time_entries, {"company_id": company_id, "technician_id": current_user["id"]}, entry_ids),
+            existing_ids(db.custom_forms, {"company_id": company_id}, form_ids),
+        )
+
+        # collection -> [(index, write)]; a note written with a job update has a write in both collections.
+        # Every write is idempotent (ids derived from the claim, $set or $setOnInsert), so a retry after
+        # an error with an unknown outcome applies nothing twice.
+        writes = {"job_notes": [], "time_entries": [], "form_submissions": []}
+        job_updates: Dict[int, dict] = {}
+        batch_notes: Dict[int, str] = {}
+        for index, payload in parsed.items():
+            operation = operations[index]
+            if operation.type == "job_status":
+                if operation.target_id not in jobs_found:
+                    finish(index, 404, "Job not found")
+                    continue
+                update = {"$set": {"status": payload["status"], "updated_at": now}}
+                if payload["status"] == "completed":
+                    update["$set"]["completed_date"] = now
+                if payload["notes"]:
+                    note = JobNote(id=job_note_id("batch", claims[index]), job_id=operation.target_id,
+                                   company_id=company_id, text=payload["notes"],
+                                   created_by=current_user["full_name"], created_at=now).dict()
+                    update["$set"]["last_note"] = job_note_summary(note)
+                    batch_notes[index] = note["id"]
+                    writes["job_notes"].append((index, UpdateOne({"id": note["id"]}, {"$setOnInsert": note}, upsert=True)))
+                job_updates[index] = update
+            elif operation.type == "job_note":
+                if operation.target_id not in jobs_found:
+                    finish(index, 404, "Job not found")
+                    continue
+                note = JobNote(id=job_note_id("batch", claims[index]), job_id=operation.target_id,
+                               company_id=company_id, text=payload["text"],
+                               created_by=current_user["full_name"], created_at=now).dict()
+                created_ids[index] = note["id"]
+                batch_notes[index] = note["id"]
+                writes["job_notes"].append((index, UpdateOne({"id": note["id"]}, {"$setOnInsert": note}, upsert=True)))
+                job_updates[index] = {"$set": {"last_note": job_note_summary(note), "updated_at": now}}
+            elif operation.type == "time_entry_update":
+                if operation.target_id not in entries_found:
+                    finish(index, 404, "Time entry not found")
+                    continue
+                update_data = {k: v for k, v in payload.dict().items() if v is not None}
+                update_data["updated_at"] = now
+                writes["time_entries"].append((index, UpdateOne(
+                    {"id": operation.target_id, "technician_id": current_user["id"], "company_id": company_id},
+                    {"$set": update_data}
+                )))
+            else:
+                if operation.target_id not in forms_found:
+                    finish(index, 404, "Form not found")
+                    continue
+                if payload.job_id not in jobs_found:
+                    finish(index, 404, "Job not found")
+                    continue
+                # A form or job deleted after the lookup above still gets the submission, as with
+                # the single submit endpoint
+                submission = FormSubmission(
+                    id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"form-submission:batch:{claims[index]}")),
+                    form_id=operation.target_id,
+                    job_id=payload.job_id,
+                    technician_id=current_user["id"],
+                    company_id=company_id,
+                    data=payload.data
+                )
+                created_ids[index] = submission.id
+                writes["form_submissions"].append((index, UpdateOne(
+                    {"id": submission.id}, {"$setOnInsert": submission.dict()}, upsert=True
+                )))
+
+        # Notes are written before the job updates that count them, and a job only counts the notes
+        # this request inserted, like record_job_note. A fresh note whose job write failed is removed
+        # so a retry inserts and counts it again.
+        attempted = sorted(set(job_updates) | {index for collection_writes in writes.values() for index, _ in collection_writes})
+        failures = {}
+        missing = {}
+        fresh_notes = set()
+
+        async def apply_stage(stage: Dict[str, list]):
+            outcomes = await asyncio.gather(*(apply_batch_writes(c, w) for c, w in stage.items()))
+            for (collection, collection_writes), (applied, error, matched, upserted) in zip(stage.items(), outcomes):
+                for position, (index, _) in enumerate(collection_writes[applied:], start=applied):
+                    failures.setdefault(index, error if position == applied else "Not applied after an earlier failure")
+                if collection == "job_notes":
+                    fresh_notes.update(collection_writes[i][0] for i in upserted)
+                elif collection in ("jobs", "time_entries") and matched < applied:
+                    # A target deleted after the lookup above matched nothing; find out which
+                    targets = {operations[index].target_id for index, _ in collection_writes[:applied]}
+                    found = await existing_ids(db[collection], {"company_id": company_id}, targets)
+                    for index, _ in collection_writes[:applied]:
+                        if operations[index].target_id not in found:
+                            missing[index] = "Job not found" if collection == "jobs" else "Time entry not found"
+                if collection == "jobs" and applied:
+                    await bump_collection_version(company_id, "jobs")
+
+        await apply_stage({c: w for c, w in writes.items() if w})
+        job_writes = []
+        for index, update in job_updates.items():
+            if index in failures:
+                continue
+            if index in fresh_notes:
+                update = {**update, "$inc": {"notes_count": 1}}
+            job_writes.append((index, UpdateOne({"id": operations[index].target_id, "company_id": company_id}, update)))
+        if job_writes:
+            # After an error with an unknown outcome the fresh notes are kept, so a retry that finds
+            # them stored never counts them twice
+            await apply_stage({"jobs": job_writes})
+        orphaned = [batch_notes[index] for index in fresh_notes if index in failures or index in missing]
+        if orphaned:
+            await db.job_notes.delete_many({"id": {"$in": orphaned}})
+        for index in attempted:
+            if index in failures:
+                finish(index, 500, failures[index])
+            elif index in missing:
+                finish(index, 404, missing[index])
+            else:
+                finish(index, 200)
+    finally:
+        # Keep results that replays should return; release keys that failed to apply so they can be retried
+        finished = [index for index in claims if results[index] is not None and results[index].status_code < 500]
+        if finished:
+            await db.idempotency_keys.bulk_write([
+                UpdateOne({"_id": claims[index]}, {"$set": {"result": results[index].dict()}}) for index in finished
+            ], ordered=False)
+        released = [claims[index] for index in claims if index not in finished]
+        if released:
+            await db.idempotency_keys.delete_many({"_id": {"$in": released}})
+
+    return BatchResult(
+        results=results,
+        applied=sum(1 for r in results if r.status_code < 300 and not r.replayed),
+        replayed=sum(1 for r in results if r.replayed),
+        failed=sum(1 for r in results if r.status_code >= 300 and not r.replayed),
+    )
+
 # Delete routes
 @api_router.delete("/clients/{client_id}")
 async def delete_client(client_id: str, current_user: dict = Depends(get_current_user)):
@@ -1424,6 +3593,9 @@ async def delete_client(client_id: str, current_user: dict = Depends(get_current
     result = await db.clients.delete_one({"id": client_id, "company_id": current_user["company_id"]})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Client not found")
+    await record_tombstone(current_user["company_id"], "clients", client_id)
+    versions = await bump_collection_version(current_user["company_id"], "clients")
+    client_suggestions.remove(current_user["company_id"], client_id, versions["clients"])
     return {"message": "Client deleted successfully"}
 
 @api_router.delete("/jobs/{job_id}")
@@ -1432,11 +3604,281 @@ async def delete_job(job_id: str, current_user: dict = Depends(get_current_user)
     result = await db.jobs.delete_one({"id": job_id, "company_id": current_user["company_id"]})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Job not found")
+    await db.job_notes.delete_many({"job_id": job_id, "company_id": current_user["company_id"]})
+    await record_tombstone(current_user["company_id"], "jobs", job_id)
+    await bump_collection_version(current_user["company_id"], "jobs")
     return {"message": "Job deleted successfully"}
 
+# Export Routes
+EXPORT_COLLECTIONS = {
+    # collection: (model, date field used for date_from/date_to, supports status filter)
+    "jobs": (Job, "scheduled_date", True),
+    "clients": (Client, "created_at", False),
+    "invoices": (Invoice, "created_at", True),
+    "time_entries": (TimeEntry, "start_time", False),
+}
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def export_value(value: Any) -> Any:
+    """Convert a Mongo value into something JSON/CSV friendly."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def iter_export_chunks(cursor, fields: List[str], fmt: str, compress: bool):
+    """Serialize documents from a cursor into bounded, optionally gzipped chunks."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore") if fmt == "csv" else None
+    if writer:
+        writer.writeheader()
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    async for doc in cursor:
+        if writer:
+            writer.writerow({
+                k: json.dumps(v, default=export_value) if isinstance(v, (list, dict)) else export_value(v)
+                for k, v in doc.items()
+            })
+        else:
+            buffer.write(json.dumps(doc, default=export_value))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+    tail = drain()
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
+
+@api_router.get("/export/{collection}")
+async def export_collection(
+    collection: str,
+    request: Request,
+    format: str = "csv",  # csv, ndjson
+    status: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    batch_size: int = Query(500, ge=1, le=10000),
+    current_user: dict = Depends(get_current_user)
+):
+    """Stream a full export of a collection as CSV or NDJSON."""
+    if collection not in EXPORT_COLLECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown collection. Must be one of: {list(EXPORT_COLLECTIONS)}")
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="Invalid format. Must be one of: ['csv', 'ndjson']")
+
+    model, date_field, supports_status = EXPORT_COLLECTIONS[collection]
+    filter_dict = {"company_id": current_user["company_id"]}
+    if status:
+        if not supports_status:
+            raise HTTPException(status_code=400, detail=f"{collection} cannot be filtered by status")
+        filter_dict["status"] = status
+    if date_from or date_to:
+        date_filter = {}
+        if date_from:
+            date_filter["$gte"] = date_from
+        if date_to:
+            date_filter["$lte"] = date_to
+        filter_dict[date_field] = date_filter
+
+    fields = list(model.model_fields)
+    cursor = db[collection].find(
+        filter_dict,
+        {"_id": 0, **{field: 1 for field in fields}},
+        batch_size=batch_size
+    )
+
+    # Exports gzip themselves in large blocks; q-values count, so "gzip;q=0" gets plain text
+    compress = negotiate_encoding(request.headers.get("accept-encoding", ""), ["gzip"]) == "gzip"
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"{collection}_{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
+    return StreamingResponse(
+        iter_export_chunks(cursor, fields, format, compress),
+        media_type=media_type,
+        headers=headers
+    )
+
+# Analytics Snapshot Routes
+SNAPSHOT_DIR = Path(os.environ.get('ANALYTICS_SNAPSHOT_DIR', ROOT_DIR / 'snapshots'))
+SNAPSHOT_BATCH_SIZE = int(os.environ.get('ANALYTICS_SNAPSHOT_BATCH_SIZE', '5000'))
+SNAPSHOT_COLLECTIONS = {
+    "jobs": Job,
+    "invoices": Invoice,
+    "time_entries": TimeEntry,
+}
+running_snapshots = set()  # company_ids with an export in progress
+
+def snapshot_dtypes(model) -> Dict[str, str]:
+    """Map model fields to pandas dtypes so every Parquet file shares one schema."""
+    dtypes = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if getattr(annotation, "__origin__", None) is Union:
+            annotation = next(arg for arg in annotation.__args__ if arg is not type(None))
+        if annotation is datetime:
+            dtypes[name] = "datetime64[ms]"
+        elif annotation is bool:
+            dtypes[name] = "boolean"
+        elif annotation is int:
+            dtypes[name] = "Int64"
+        elif annotation is float:
+            dtypes[name] = "Float64"
+        else:
+            dtypes[name] = "string"  # str, plus lists/dicts stored as JSON text
+    return dtypes
+
+def write_snapshot_batch(docs: List[dict], model, path: Path):
+    """Append a batch of documents to a date-partitioned Parquet dataset."""
+    import pandas as pd
+    dtypes = snapshot_dtypes(model)
+    rows = [
+        {k: json.dumps(v, default=export_value) if isinstance(v, (list, dict)) else v for k, v in doc.items()}
+        for doc in docs
+    ]
+    df = pd.DataFrame(rows, columns=list(dtypes)).astype(dtypes)
+    df["date"] = df["updated_at"].dt.strftime("%Y-%m-%d")
+    df.to_parquet(path, engine="pyarrow", partition_cols=["date"], index=False)
+
+async def export_snapshots(company_id: str):
+    """Incrementally export a tenant's analytics collections to Parquet."""
+    loop = asyncio.get_running_loop()
+    # Leave a small gap so writes landing in the same millisecond are picked up next run
+    cutoff = datetime.utcnow() - timedelta(seconds=1)
+    try:
+        for collection, model in SNAPSHOT_COLLECTIONS.items():
+            state = await db.snapshot_watermarks.find_one({"company_id": company_id, "collection": collection})
+            watermark = state["watermark"] if state else datetime.min
+            path = SNAPSHOT_DIR / company_id / collection
+
+            cursor = analytics_db()[collection].find(
+                {"company_id": company_id, "updated_at": {"$gt": watermark, "$lte": cutoff}},
+                {"_id": 0, **{field: 1 for field in model.model_fields}},
+                batch_size=SNAPSHOT_BATCH_SIZE
+            ).sort("updated_at", 1)
+
+            exported = 0
+            new_watermark = watermark
+            batch = []
+            async for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= SNAPSHOT_BATCH_SIZE:
+                    await loop.run_in_executor(None, write_snapshot_batch, batch, model, path)
+                    exported += len(batch)
+                    new_watermark = batch[-1]["updated_at"]
+                    batch = []
+            if batch:
+                await loop.run_in_executor(None, write_snapshot_batch, batch, model, path)
+                exported += len(batch)
+                new_watermark = batch[-1]["updated_at"]
+
+            # Only advance the watermark once the whole collection is written; an
+            # interrupted run re-exports rows rather than skipping them.
+            if exported:
+                await db.snapshot_watermarks.update_one(
+                    {"company_id": company_id, "collection": collection},
+                    {"$set": {"watermark": new_watermark, "updated_at": datetime.utcnow()},
+                     "$inc": {"rows_exported": exported}},
+                    upsert=True
+                )
+            logger.info("Exported %d %s rows to snapshots for company %s", exported, collection, company_id)
+    except Exception:
+        logger.exception("Analytics snapshot export failed for company %s", company_id)
+    finally:
+        running_snapshots.discard(company_id)
+
+@api_router.post("/analytics/snapshots", status_code=202)
+async def create_analytics_snapshot(background_tasks: BackgroundTasks, current_user: dict = Depends(get_current_user)):
+    """Start an incremental Parquet export of jobs, invoices and time entries."""
+    company_id = current_user["company_id"]
+    if company_id in running_snapshots:
+        raise HTTPException(status_code=409, detail="A snapshot export is already running")
+    running_snapshots.add(company_id)
+    background_tasks.add_task(export_snapshots, company_id)
+    return {"message": "Snapshot export started"}
+
+@api_router.get("/analytics/snapshots")
+async def get_analytics_snapshots(current_user: dict = Depends(get_current_user)):
+    """List Parquet snapshot files and export watermarks for current company."""
+    company_id = current_user["company_id"]
+    base = SNAPSHOT_DIR / company_id
+    files = []
+    if base.exists():
+        for file_path in sorted(base.glob("*/date=*/*.parquet")):
+            stat = file_path.stat()
+            files.append({
+                "collection": file_path.parent.parent.name,
+                "partition": file_path.parent.name,
+                "filename": file_path.name,
+                "size_bytes": stat.st_size,
+                "modified_at": datetime.utcfromtimestamp(stat.st_mtime)
+            })
+
+    watermarks = await db.snapshot_watermarks.find({"company_id": company_id}, {"_id": 0}).to_list(100)
+    return {
+        "running": company_id in running_snapshots,
+        "watermarks": watermarks,
+        "files": files
+    }
+
+@api_router.get("/analytics/snapshots/{collection}/{partition}/{filename}")
+async def download_analytics_snapshot(
+    collection: str,
+    partition: str,
+    filename: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """Download a single Parquet snapshot file."""
+    base = (SNAPSHOT_DIR / current_user["company_id"]).resolve()
+    file_path = (base / collection / partition / filename).resolve()
+    if (collection not in SNAPSHOT_COLLECTIONS or base not in file_path.parents
+            or file_path.suffix != ".parquet" or not file_path.is_file()):
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return FileResponse(file_path, media_type="application/vnd.apache.parquet", filename=f"{collection}_{partition}_{filename}")
+
+# Admin Routes
+@api_router.post("/admin/profile", response_class=PlainTextResponse)
+async def profile_process(
+    seconds: float = Query(10, gt=0, le=120),
+    interval_ms: float = Query(5, ge=1, le=1000),
+    current_user: dict = Depends(require_platform_admin)
+):
+    """Sample the event loop thread for a while and return collapsed stacks for a flamegraph."""
+    try:
+        samples = await stack_sampler.sample(seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(format_collapsed(samples))
+
+@api_router.get("/admin/profile/slow-requests")
+async def get_slow_request_profiles(current_user: dict = Depends(require_platform_admin)):
+    """List the most recent slow-request stack captures, newest first."""
+    return {
+        "threshold_ms": SLOW_REQUEST_PROFILE_MS,
+        "captures": list(reversed(slow_request_captures))
+    }
+
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Expose runtime metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -1444,23 +3886,53 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def verify_db_indexes():
+    """Build missing indexes on empty collections; log the rest, leaving those builds to manage.py.
+
+    Building on an empty collection is instant, so a fresh deployment starts with its unique and
+    TTL indexes in place. A missing unique or TTL index on a collection with data is logged as an
+    error, since without it duplicates or expired documents accumulate.
+    """
+    for collection, result in (await diff_indexes(db)).items():
+        missing = result["missing"]
+        if missing and await db[collection].estimated_document_count() == 0:
+            built = await db[collection].create_indexes(missing)
+            logger.info("%s indexes: built %s on the empty collection", collection, ", ".join(built))
+            missing = []
+        problems = [f"missing {model.document['name']}" for model in missing]
+        problems += [f"options differ on {name}" for name in result["changed"]]
+        if problems:
+            constraint = any("unique" in model.document or "expireAfterSeconds" in model.document for model in missing)
+            logger.log(logging.ERROR if constraint else logging.WARNING,
+                       "%s indexes: %s; run `python manage.py indexes --build`", collection, ", ".join(problems))
+
+async def warm_up_db():
+    """Open MONGO_MIN_POOL_SIZE connections (at least one) now rather than on the first burst of traffic."""
+    # Concurrent pings each check out their own connection, growing the pool to that size
+    await asyncio.gather(*(db.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE))))
+
 @app.on_event("startup")
 async def startup_db_client():
-    """Initialize database indexes on startup."""
-    # Create indexes for better performance
-    await db.users.create_index("email", unique=True)
-    await db.companies.create_index("id", unique=True)
-    await db.clients.create_index([("company_id", 1), ("email", 1)])
-    await db.jobs.create_index([("company_id", 1), ("status", 1), ("scheduled_date", 1)])
-    await db.invoices.create_index([("company_id", 1), ("status", 1)])
-    
-    # New indexes for enhanced features
-    await db.time_entries.create_index([("company_id", 1), ("technician_id", 1), ("job_id", 1)])
-    await db.time_entries.create_index([("technician_id", 1), ("end_time", 1)])  # for active entries
-    await db.notifications.create_index([("user_id", 1), ("company_id", 1), ("created_at", -1)])
-    await db.notifications.create_index([("user_id", 1), ("is_read", 1)])
-    await db.custom_forms.create_index([("company_id", 1), ("service_types", 1)])
-    await db.form_submissions.create_index([("company_id", 1), ("form_id", 1), ("job_id", 1)])
+    """Run independent startup work concurrently."""
+    await asyncio.gather(verify_db_indexes(), warm_up_db())
+
+@app.on_event("startup")
+async def start_slow_request_profiler():
+    """Begin background stack sampling when slow-request capture is configured."""
+    if SLOW_REQUEST_PROFILE_MS:
+        try:
+            stack_sampler.enable_background(SLOW_REQUEST_PROFILE_INTERVAL_MS / 1000)
+        except RuntimeError as e:
+            logger.warning("Slow-request profiling disabled: %s", e)
+
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    """Start measuring event loop lag; EVENT_LOOP_DEBUG also reports blocking callbacks."""
+    event_loop_monitor.start(debug=EVENT_LOOP_DEBUG)
+
+@app.on_event("shutdown")
+async def stop_event_loop_monitor():
+    event_loop_monitor.stop()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
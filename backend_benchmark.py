@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Load-test and Benchmark Harness for Jobber Pro Backend API
+Starts the app in-process against a local mongod (or a mongomock-motor stand-in), seeds
+synthetic tenants of configurable size with backend/generate_data.py, drives concurrent
+load per endpoint and reports p50/p95/p99 latency and throughput. Results are written
+as JSON so runs can be compared across commits; --baseline fails the run when an
+endpoint regresses past a threshold.
+
+Examples:
+    python backend_benchmark.py --mongomock --tenant-sizes 1000
+    MONGO_URL=mongodb://localhost:27017 python backend_benchmark.py --tenant-sizes 1000,100000
+    python backend_benchmark.py --mongomock --baseline bench_main.json --max-regression 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).parent / "backend"
+
+DEFAULT_ENDPOINTS = [
+    "/api/jobs",
+    "/api/jobs?status=completed",
+    "/api/clients",
+    "/api/invoices",
+    "/api/time-entries",
+    "/api/dashboard/stats",
+    "/api/dashboard/recent-jobs",
+    "/api/analytics/revenue",
+    "/api/analytics/jobs",
+    "/api/analytics/clients",
+    "/api/analytics/business-insights",
+]
+
+def parse_size(value: str) -> int:
+    """Parse tenant sizes such as 1000, 1k, 100k or 1m."""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class JobberProBenchmark:
+    def __init__(self, args):
+        self.args = args
+        self.server = None
+        self.tenants: Dict[int, Dict[str, str]] = {}  # size -> {"company_id", "token"}
+        self.results: Dict[str, Dict] = {}
+        self.serialization: Dict[str, float] = {}
+
+    def load_app(self):
+        """Import the FastAPI app, pointing it at the benchmark database."""
+        os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+        os.environ["DB_NAME"] = self.args.db_name
+        sys.path.insert(0, str(BACKEND_DIR))
+        import server
+        if self.args.mongomock:
+            from mongomock_motor import AsyncMongoMockClient
+            server.db = AsyncMongoMockClient()[self.args.db_name]
+        self.server = server
+
+    async def seed_tenant(self, jobs_count: int) -> Dict[str, str]:
+        """Insert one synthetic tenant with the given number of jobs using the data generator."""
+        import generate_data
+        db = self.server.db
+        anchor = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        docs = generate_data.generate_tenant(self.args.seed, jobs_count, jobs_count, anchor)
+        for collection in generate_data.COLLECTION_ORDER:
+            await self.insert_batched(db[collection], docs[collection])
+
+        admin = next(user for user in docs["users"] if user["role"] == "admin")
+        token = self.server.create_access_token(data={"sub": admin["email"]})
+        return {"company_id": admin["company_id"], "token": token}
+
+    async def insert_batched(self, collection, docs: List[dict]):
+        for start in range(0, len(docs), self.args.batch_size):
+            batch = docs[start:start + self.args.batch_size]
+            if batch:
+                await collection.insert_many(batch, ordered=False)
+
+    async def drive(self, client, endpoint: str, token: str) -> Dict:
+        """Issue --requests calls to one endpoint with --concurrency workers."""
+        headers = {"Authorization": f"Bearer {token}"}
+        latencies = []
+        errors = 0
+        remaining = self.args.requests
+
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                response = await client.get(endpoint, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        for _ in range(self.args.warmup):
+            await client.get(endpoint, headers=headers)
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+        wall = time.perf_counter() - wall_start
+
+        latencies.sort()
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+            "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else 0.0,
+        }
+
+    def benchmark_serialization(self, rows: int, repeats: int = 5) -> Dict[str, float]:
+        """Rows/sec for a List[Job] response: FastAPI's validate-and-serialize path vs trusted_response."""
+        import generate_data
+        from pydantic import TypeAdapter
+
+        anchor = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        docs = generate_data.generate_tenant(self.args.seed, 0, rows, anchor)["jobs"][:rows]
+        adapter = TypeAdapter(List[self.server.Job])
+
+        def validated():
+            # What response_model=List[Job] does per response before JSONResponse renders it
+            content = adapter.dump_python(adapter.validate_python(docs), mode="json")
+            return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+        def trusted():
+            return self.server.trusted_response(docs, self.server.Job).body
+
+        result = {"rows": len(docs)}
+        for name, serialize in (("validated", validated), ("trusted", trusted)):
+            best = min(self.time_call(serialize) for _ in range(repeats))
+            result[f"{name}_rows_per_sec"] = round(len(docs) / best)
+        result["speedup"] = round(result["trusted_rows_per_sec"] / result["validated_rows_per_sec"], 2)
+        print(f"Serialization of {len(docs)} jobs: {result['validated_rows_per_sec']:,} rows/s validated, "
+              f"{result['trusted_rows_per_sec']:,} rows/s trusted ({result['speedup']}x)")
+        return result
+
+    @staticmethod
+    def time_call(fn) -> float:
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    async def run(self):
+        import httpx
+
+        self.load_app()
+        if self.args.serialization_rows:
+            self.serialization = self.benchmark_serialization(self.args.serialization_rows)
+        app = self.server.app
+        if not self.args.mongomock:
+            await self.server.client.drop_database(self.args.db_name)
+            await self.server.build_indexes(self.server.db)
+        await app.router.startup()
+
+        try:
+            for size in self.args.tenant_sizes:
+                seed_start = time.perf_counter()
+                self.tenants[size] = await self.seed_tenant(size)
+                print(f"Seeded tenant with {size} jobs in {time.perf_counter() - seed_start:.1f}s")
+
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                for size, tenant in self.tenants.items():
+                    for endpoint in self.args.endpoints:
+                        key = f"{size}:{endpoint}"
+                        self.results[key] = await self.drive(client, endpoint, tenant["token"])
+                        result = self.results[key]
+                        print(f"{key:<55} p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+                              f"p99 {result['p99_ms']:>9.2f}ms  {result['throughput_rps']:>8.1f} req/s"
+                              + (f"  {result['errors']} errors" if result['errors'] else ""))
+        finally:
+            await app.router.shutdown()
+            if not self.args.mongomock and not self.args.keep_data:
+                await self.server.client.drop_database(self.args.db_name)
+
+    def report(self) -> Dict:
+        try:
+            commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                    cwd=Path(__file__).parent).stdout.strip() or None
+        except OSError:
+            commit = None
+        return {
+            "meta": {
+                "commit": commit,
+                "timestamp": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "database": "mongomock" if self.args.mongomock else os.environ.get("MONGO_URL"),
+                "tenant_sizes": self.args.tenant_sizes,
+                "requests": self.args.requests,
+                "concurrency": self.args.concurrency,
+                "seed": self.args.seed,
+            },
+            "results": self.results,
+            "serialization": self.serialization,
+        }
+
+def compare(report: Dict, baseline: Dict, max_regression: float, metric: str = "p95_ms") -> List[str]:
+    """Return a line per endpoint whose metric regressed by more than max_regression."""
+    regressions = []
+    for key, result in report["results"].items():
+        previous = baseline.get("results", {}).get(key)
+        if not previous or not previous.get(metric):
+            continue
+        change = (result[metric] - previous[metric]) / previous[metric]
+        if change > max_regression:
+            regressions.append(f"{key}: {metric} {previous[metric]:.2f}ms -> {result[metric]:.2f}ms (+{change:.0%})")
+    return regressions
+
+def main():
+    """Run the benchmark and return a process exit code"""
+    parser = argparse.ArgumentParser(description="Benchmark Jobber Pro API endpoints in-process")
+    parser.add_argument("--mongomock", action="store_true", help="use mongomock-motor instead of MONGO_URL")
+    parser.add_argument("--db-name", default="jobber_pro_bench")
+    parser.add_argument("--tenant-sizes", default="1k", type=lambda v: [parse_size(s) for s in v.split(",")],
+                        help="comma separated jobs per tenant, e.g. 1k,100k,1m")
+    parser.add_argument("--endpoints", default=",".join(DEFAULT_ENDPOINTS), type=lambda v: v.split(","))
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint and tenant")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=3, help="untimed requests before each endpoint")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="insert_many batch size for seeding")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="fail when p95 grows by more than this fraction over the baseline")
+    parser.add_argument("--serialization-rows", type=int, default=1000,
+                        help="rows for the response serialization micro-benchmark (0 to skip)")
+    parser.add_argument("--keep-data", action="store_true", help="keep the seeded mongod database")
+    args = parser.parse_args()
+
+    benchmark = JobberProBenchmark(args)
+    asyncio.run(benchmark.run())
+    report = benchmark.report()
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.max_regression)
+        if regressions:
+            print("❌ Performance regressions:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ No regressions against baseline")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
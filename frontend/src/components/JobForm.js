@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 
 const api = axios.create({
@@ -14,7 +14,10 @@ api.interceptors.request.use((config) => {
 });
 
 const JobForm = ({ job, onSave, onClose }) => {
-  const [clients, setClients] = useState([]);
+  const [clientQuery, setClientQuery] = useState('');
+  const [suggestions, setSuggestions] = useState([]);
+  const [showSuggestions, setShowSuggestions] = useState(false);
+  const suggestTimer = useRef(null);
   const [formData, setFormData] = useState({
     title: job?.title || '',
     description: job?.description || '',
@@ -30,20 +33,56 @@ const JobForm = ({ job, onSave, onClose }) => {
   const [error, setError] = useState('');
 
   useEffect(() => {
-    fetchClients();
+    if (job?.client_id) {
+      fetchClientName(job.client_id);
+    }
+    return () => clearTimeout(suggestTimer.current);
   }, []);
 
-  const fetchClients = async () => {
+  const fetchClientName = async (clientId) => {
     try {
-      const response = await api.get('/clients');
-      setClients(response.data);
+      const response = await api.get(`/clients/${clientId}`);
+      setClientQuery(response.data.name);
     } catch (error) {
-      console.error('Error fetching clients:', error);
+      console.error('Error fetching client:', error);
+    }
+  };
+
+  const fetchSuggestions = async (prefix) => {
+    try {
+      const response = await api.get('/clients/suggest', { params: { prefix } });
+      setSuggestions(response.data);
+      setShowSuggestions(true);
+    } catch (error) {
+      console.error('Error fetching client suggestions:', error);
+    }
+  };
+
+  const handleClientQueryChange = (e) => {
+    const value = e.target.value;
+    setClientQuery(value);
+    setFormData({ ...formData, client_id: '' });
+    clearTimeout(suggestTimer.current);
+    if (!value.trim()) {
+      setSuggestions([]);
+      return;
     }
+    // Wait for a pause in typing so each keystroke doesn't cost a request
+    suggestTimer.current = setTimeout(() => fetchSuggestions(value), 150);
+  };
+
+  const selectClient = (client) => {
+    setFormData({ ...formData, client_id: client.id });
+    setClientQuery(client.name);
+    setShowSuggestions(false);
   };
 
   const handleSubmit = async (e) => {
     e.preventDefault();
+    if (!formData.client_id) {
+      setError('Please select a client from the suggestions');
+      return;
+    }
     setLoading(true);
     setError('');
 
@@ -102,18 +141,35 @@ const JobForm = ({ job, onSave, onClose }) => {
         
         <div>
           <label className="block text-sm font-medium text-gray-700 mb-1">Client *</label>
-          <select
-            name="client_id"
-            value={formData.client_id}
-            onChange={handleInputChange}
-            className="w-full border border-gray-300 rounded-lg px-3 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
-            required
-          >
-            <option value="">Select Client</option>
-            {clients.map(client => (
-              <option key={client.id} value={client.id}>{client.name}</option>
-            ))}
-          </select>
+          <div className="relative">
+            <input
+              type="text"
+              value={clientQuery}
+              onChange={handleClientQueryChange}
+              onFocus={() => suggestions.length > 0 && setShowSuggestions(true)}
+              onBlur={() => setTimeout(() => setShowSuggestions(false), 150)}
+              placeholder="Search by name, email or phone"
+              autoComplete="off"
+              className="w-full border border-gray-300 rounded-lg px-3 py-2 focus:outline-none focus:ring-2 focus:ring-blue-500"
+              required
+            />
+            {showSuggestions && suggestions.length > 0 && (
+              <ul className="absolute z-10 mt-1 w-full bg-white border border-gray-300 rounded-lg shadow-lg max-h-60 overflow-y-auto">
+                {suggestions.map(client => (
+                  <li
+                    key={client.id}
+                    onMouseDown={() => selectClient(client)}
+                    className="px-3 py-2 cursor-pointer hover:bg-blue-50"
+                  >
+                    <div className="text-sm text-gray-900">{client.name}</div>
+                    {(client.email || client.phone) && (
+                      <div className="text-xs text-gray-500">{[client.email, client.phone].filter(Boolean).join(' · ')}</div>
+                    )}
+                  </li>
+                ))}
+              </ul>
+            )}
+          </div>
         </div>
 
         <div className="md:col-span-2">
@@ -0,0 +1,126 @@
+"""
+Behavioral tests for /api/batch: validation, partial failure and idempotent replays.
+
+Runs against mongomock-motor, so no mongod is needed.
+
+    python -m pytest tests/test_batch.py -q
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+USER = {"id": "t1", "company_id": "acme", "email": "tech@acme.test", "full_name": "Tech One", "role": "technician"}
+NOW = datetime(2026, 6, 1, 9)
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()["batch_tests"]
+    jobs = [
+        server.Job(id=job_id, title=f"Job {job_id}", client_id="c1", service_type="Lawn", scheduled_date=NOW,
+                   estimated_duration=60, estimated_cost=100.0, company_id="acme").dict()
+        for job_id in ("j1", "j2")
+    ]
+    asyncio.run(db.jobs.insert_many(jobs))
+    asyncio.run(db.time_entries.insert_one(
+        server.TimeEntry(id="te1", job_id="j1", technician_id="t1", company_id="acme", start_time=NOW).dict()
+    ))
+    asyncio.run(db.custom_forms.insert_one({"id": "f1", "company_id": "acme", "name": "Checklist"}))
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+@pytest.fixture
+def client(mock_db):
+    server.app.dependency_overrides[server.get_current_user] = lambda: USER
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.clear()
+
+def operation(key, kind, target_id, **data):
+    return {"idempotency_key": key, "type": kind, "target_id": target_id, "data": data}
+
+OPERATIONS = [
+    operation("k1", "job_status", "j1", status="in_progress"),
+    operation("k2", "job_note", "j1", text="Gate code 1234"),
+    operation("k3", "time_entry_update", "te1", end_time="2026-06-01T11:00:00"),
+    operation("k4", "form_submission", "f1", job_id="j1", data={"ok": True}),
+    operation("k5", "job_status", "j2", status="completed", notes="All done"),
+]
+
+def job(mock_db, job_id):
+    return asyncio.run(mock_db.jobs.find_one({"id": job_id}))
+
+def count(mock_db, collection):
+    return asyncio.run(mock_db[collection].count_documents({}))
+
+def test_batch_applies_every_operation(client, mock_db):
+    body = client.post("/api/batch", json={"operations": OPERATIONS}).json()
+    assert [r["status_code"] for r in body["results"]] == [200] * 5
+    assert (body["applied"], body["replayed"], body["failed"]) == (5, 0, 0)
+
+    assert job(mock_db, "j1")["status"] == "in_progress"
+    assert job(mock_db, "j1")["notes_count"] == 1
+    assert job(mock_db, "j1")["last_note"]["text"] == "Gate code 1234"
+    assert job(mock_db, "j2")["status"] == "completed" and job(mock_db, "j2")["notes_count"] == 1
+    assert asyncio.run(mock_db.time_entries.find_one({"id": "te1"}))["end_time"] == datetime(2026, 6, 1, 11)
+    # Created documents are returned under the ids they were stored with
+    assert asyncio.run(mock_db.job_notes.find_one({"id": body["results"][1]["id"]}))["text"] == "Gate code 1234"
+    assert asyncio.run(mock_db.form_submissions.find_one({"id": body["results"][3]["id"]}))["data"] == {"ok": True}
+
+def test_replay_returns_first_results_without_writing_again(client, mock_db):
+    first = client.post("/api/batch", json={"operations": OPERATIONS}).json()
+    replay = client.post("/api/batch", json={"operations": OPERATIONS}).json()
+
+    assert (replay["applied"], replay["replayed"], replay["failed"]) == (0, 5, 0)
+    assert all(r["replayed"] for r in replay["results"])
+    assert [r["id"] for r in replay["results"]] == [r["id"] for r in first["results"]]
+    assert job(mock_db, "j1")["notes_count"] == 1
+    assert count(mock_db, "job_notes") == 2
+    assert count(mock_db, "form_submissions") == 1
+
+def test_invalid_and_missing_targets_fail_alone(client, mock_db):
+    body = client.post("/api/batch", json={"operations": [
+        operation("a", "job_note", "j1", text="kept"),
+        operation("b", "job_status", "missing", status="completed"),
+        operation("c", "job_status", "j1", status="bogus"),
+        operation("c", "job_note", "j1", text="same key"),
+        operation("d", "time_entry_update", "te1", break_duration="abc"),
+        operation("e", "form_submission", "f1", job_id="missing"),
+        operation("f", "explode", "j1"),
+    ]}).json()
+    assert [r["status_code"] for r in body["results"]] == [200, 404, 400, 400, 422, 404, 400]
+    assert (body["applied"], body["failed"]) == (1, 6)
+    assert job(mock_db, "j1")["notes_count"] == 1 and job(mock_db, "j1")["status"] == "scheduled"
+
+    # Failed operations release their keys, so a corrected retry is applied
+    retry = client.post("/api/batch", json={"operations": [operation("c", "job_status", "j1", status="completed")]}).json()
+    assert retry["applied"] == 1 and not retry["results"][0]["replayed"]
+
+def test_job_deleted_before_the_write_is_reported_missing(client, mock_db, monkeypatch):
+    collection_type = type(mock_db.jobs)
+    bulk_write = collection_type.bulk_write
+
+    async def delete_then_write(self, requests, **kwargs):
+        if self.name == "jobs":
+            await self.delete_one({"id": "j2"})
+        return await bulk_write(self, requests, **kwargs)
+
+    monkeypatch.setattr(collection_type, "bulk_write", delete_then_write)
+    body = client.post("/api/batch", json={"operations": [
+        operation("a", "job_note", "j1", text="one"),
+        operation("b", "job_note", "j2", text="two"),
+    ]}).json()
+    assert [(r["status_code"], r["error"]) for r in body["results"]] == [(200, None), (404, "Job not found")]
+    # The note written for the deleted job is removed again
+    assert asyncio.run(mock_db.job_notes.count_documents({"job_id": "j2"})) == 0
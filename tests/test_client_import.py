@@ -0,0 +1,87 @@
+"""
+Behavioral tests for /api/clients/import.
+
+Runs against mongomock-motor, so no mongod is needed.
+
+    python -m pytest tests/test_client_import.py -q
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+USER = {"id": "u1", "company_id": "acme", "email": "admin@acme.test", "full_name": "Admin", "role": "admin"}
+HEADER = "name,email,phone,address\n"
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()["client_import_tests"]
+    asyncio.run(db.clients.insert_one(server.Client(
+        id="c1", name="Existing", email="old@example.com", phone="1", address="Old Road", company_id="acme"
+    ).dict()))
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+@pytest.fixture
+def client(mock_db):
+    server.app.dependency_overrides[server.get_current_user] = lambda: USER
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.clear()
+
+def upload(client, content: bytes, filename="clients.csv"):
+    return client.post("/api/clients/import", files={"file": (filename, content, "text/csv")})
+
+def stored(mock_db):
+    return {doc["email"]: doc for doc in asyncio.run(mock_db.clients.find({"company_id": "acme"}).to_list(None))}
+
+def test_mixed_case_duplicates_are_imported_once(client, mock_db):
+    csv = HEADER + "Ann,Ann@Example.com,(555) 010-0001,1 Main St\nAnnie,ann@EXAMPLE.com,2,2 Main St\nBob,bob@example.com,3,3 Main St\n"
+    body = upload(client, ("\ufeff" + csv).encode()).json()
+    assert body == {"inserted": 2, "updated": 0, "skipped": 1, "errors": [{"row": 2, "error": "Duplicate email in file"}]}
+    clients = stored(mock_db)
+    assert clients["ann@example.com"]["name"] == "Ann"  # the first occurrence wins
+    assert clients["ann@example.com"]["phone_digits"] == "5550100001"
+
+def test_existing_client_is_matched_case_insensitively_and_updated(client, mock_db):
+    body = upload(client, (HEADER + "Renamed,OLD@example.com,1,New Road\n").encode()).json()
+    assert (body["inserted"], body["updated"]) == (0, 1)
+    clients = stored(mock_db)
+    assert list(clients) == ["old@example.com"]
+    assert clients["old@example.com"]["id"] == "c1"
+    assert clients["old@example.com"]["address"] == "New Road"
+
+    # Reimporting identical rows writes nothing
+    body = upload(client, (HEADER + "Renamed,old@example.com,1,New Road\n").encode()).json()
+    assert (body["inserted"], body["updated"], body["skipped"]) == (0, 0, 1)
+
+def test_ndjson_with_malformed_and_invalid_rows(client, mock_db):
+    ndjson = (
+        b'{"name": "Cy", "email": "cy@example.com", "phone": "4", "address": "x"}\n'
+        b"\n"
+        b"not json\n"
+        b'{"name": "No Email", "phone": "5", "address": "y"}\n'
+    )
+    body = upload(client, ndjson, filename="clients.ndjson").json()
+    assert (body["inserted"], body["skipped"]) == (1, 2)
+    assert [error["row"] for error in body["errors"]] == [3, 4]
+    assert body["errors"][0]["error"] == "Malformed row"
+
+def test_invalid_utf8_is_rejected_with_its_line(client):
+    response = upload(client, HEADER.encode() + b"Ann,ann@example.com,1,a\nB\xffb,b@example.com,2,b\n")
+    assert response.status_code == 400
+    assert "line 3" in response.json()["detail"]
+
+def test_unknown_format_is_rejected(client):
+    response = client.post("/api/clients/import", params={"format": "xml"}, files={"file": ("c.xml", b"x", "text/xml")})
+    assert response.status_code == 400
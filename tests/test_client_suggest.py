@@ -0,0 +1,120 @@
+"""
+Unit tests for the in-memory client suggest index behind /api/clients/suggest.
+
+Runs against mongomock-motor, so no mongod is needed.
+
+    python -m pytest tests/test_client_suggest.py -q
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+CLIENTS = [
+    {"id": "c1", "company_id": "acme", "name": "Maria Müller", "email": "maria@example.com", "phone": "+1 (555) 999-0000"},
+    {"id": "c2", "company_id": "acme", "name": "Mario Rossi", "email": "rossi@example.org", "phone": "555-0101"},
+    {"id": "c3", "company_id": "acme", "name": "Ann Marsh", "email": "ann@example.net", "phone": None},
+    {"id": "c4", "company_id": "globex", "name": "Marvin Gaye", "email": None, "phone": "777"},
+]
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()["client_suggest_tests"]
+    asyncio.run(db.clients.insert_many([dict(client) for client in CLIENTS]))
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+def suggest(index, prefix, company_id="acme", limit=10):
+    return [client["id"] for client in asyncio.run(index.suggest(company_id, prefix, limit))]
+
+def test_prefix_normalization():
+    assert server.suggest_prefix("  MÜL ") == "mul"
+    assert server.suggest_prefix("Éva") == "eva"
+    assert server.suggest_prefix("(555) 999") == "555999"
+    assert server.suggest_prefix("+1 557") == "1557"
+    assert server.suggest_prefix("555-999") == "555999"
+    # Digits mixed with letters are text, not a phone number
+    assert server.suggest_prefix("Unit 5") == "unit 5"
+
+def test_client_suggest_keys():
+    keys = server.client_suggest_keys(CLIENTS[0])
+    assert keys == sorted(keys)
+    assert set(keys) == {"maria muller", "muller", "maria@example.com", "15559990000"}
+
+def test_suggest_by_name_word_email_and_phone(mock_db):
+    index = server.ClientSuggestIndex(recheck_seconds=60)
+    assert suggest(index, "mar") == ["c1", "c2", "c3"]  # "ann marsh" matches on its second word
+    assert suggest(index, "MÜL") == ["c1"]
+    assert suggest(index, "mull") == ["c1"]
+    assert suggest(index, "rossi@") == ["c2"]
+    assert suggest(index, "1 (555) 999") == ["c1"]
+    assert suggest(index, "555-01") == ["c2"]
+    assert suggest(index, "zzz") == []
+    assert suggest(index, "   ") == []
+    assert suggest(index, "marv") == []  # other tenant
+    assert suggest(index, "marv", company_id="globex") == ["c4"]
+
+def test_limit_stops_at_distinct_clients(mock_db):
+    index = server.ClientSuggestIndex(recheck_seconds=60)
+    assert len(suggest(index, "mar", limit=2)) == 2
+    # c1 matches "maria muller" and "maria@example.com" but is returned once
+    assert suggest(index, "maria", limit=5) == ["c1"]
+
+def test_upsert_and_remove_keep_keys_sorted(mock_db):
+    index = server.ClientSuggestIndex(recheck_seconds=60)
+    suggest(index, "mar")
+    tenant = index.tenants["acme"]
+    version = tenant["version"]
+
+    index.upsert("acme", {"id": "c5", "name": "Zed Adams", "email": "zed@example.com", "phone": "123"}, version + 1)
+    assert tenant["keys"] == sorted(tenant["keys"])
+    assert suggest(index, "adam") == ["c5"]
+
+    index.upsert("acme", {"id": "c5", "name": "Zed Brown", "email": "zed@example.com", "phone": "123"}, version + 2)
+    assert tenant["keys"] == sorted(tenant["keys"])
+    assert suggest(index, "adam") == []
+    assert suggest(index, "brow") == ["c5"]
+
+    index.remove("acme", "c5", version + 3)
+    assert tenant["keys"] == sorted(tenant["keys"])
+    assert suggest(index, "zed") == []
+    assert all(client_id != "c5" for _, client_id in tenant["keys"])
+    assert tenant["version"] == version + 3
+
+def test_advance_only_on_next_version():
+    tenant = {"version": 4}
+    server.ClientSuggestIndex._advance(tenant, 6)
+    assert tenant["version"] == 4  # a write from another worker was missed; the next recheck reloads
+    server.ClientSuggestIndex._advance(tenant, 4)
+    assert tenant["version"] == 4
+    server.ClientSuggestIndex._advance(tenant, 5)
+    assert tenant["version"] == 5
+
+def test_recheck_reloads_after_external_write(mock_db):
+    index = server.ClientSuggestIndex(recheck_seconds=0)
+    assert suggest(index, "zoe") == []
+    asyncio.run(mock_db.clients.insert_one({"id": "c6", "company_id": "acme", "name": "Zoe Quinn"}))
+    asyncio.run(server.bump_collection_version("acme", "clients"))
+    assert suggest(index, "zoe") == ["c6"]
+    assert index.misses == 2
+
+def test_least_recently_used_tenant_is_evicted(mock_db):
+    acme_keys = sum(len(server.client_suggest_keys(c)) for c in CLIENTS if c["company_id"] == "acme")
+    index = server.ClientSuggestIndex(max_keys=acme_keys + 1, recheck_seconds=60)
+    suggest(index, "mar")
+    suggest(index, "marv", company_id="globex")
+    assert list(index.tenants) == ["globex"]
+    suggest(index, "mar")
+    assert list(index.tenants) == ["acme"]
+    # The most recently used tenant is kept even when it alone exceeds max_keys
+    index.max_keys = 1
+    suggest(index, "mar")
+    assert list(index.tenants) == ["acme"]
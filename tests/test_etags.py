@@ -0,0 +1,86 @@
+"""
+Behavioral tests for conditional GET on list routes: ETags from collection versions and 304s.
+
+Runs against mongomock-motor, so no mongod is needed.
+
+    python -m pytest tests/test_etags.py -q
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+ACME = {"id": "u1", "company_id": "acme", "email": "admin@acme.test", "full_name": "Admin", "role": "admin"}
+GLOBEX = {**ACME, "id": "u2", "company_id": "globex"}
+CLIENT = {"name": "Ann", "email": "ann@example.com", "phone": "1", "address": "1 Main St"}
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()["etag_tests"]
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+@pytest.fixture
+def client(mock_db):
+    server.app.dependency_overrides[server.get_current_user] = lambda: ACME
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.clear()
+
+def test_etag_matching():
+    etag = 'W/"clients-3-abc"'
+    assert server.etag_matches('W/"clients-3-abc"', etag)
+    assert server.etag_matches('"clients-3-abc"', etag)  # weak comparison ignores W/
+    assert server.etag_matches('W/"other", W/"clients-3-abc"', etag)
+    assert server.etag_matches("*", etag)
+    assert not server.etag_matches('W/"clients-4-abc"', etag)
+    assert not server.etag_matches("", etag)
+
+def test_unchanged_list_is_answered_304(client):
+    first = client.get("/api/clients")
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"clients-0-')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    response = client.get("/api/clients", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+def test_write_to_the_collection_changes_the_etag(client):
+    etag = client.get("/api/clients").headers["etag"]
+    jobs_etag = client.get("/api/jobs").headers["etag"]
+    assert client.post("/api/clients", json=CLIENT).status_code == 200
+
+    response = client.get("/api/clients", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [c["email"] for c in response.json()] == ["ann@example.com"]
+    assert response.headers["etag"].startswith('W/"clients-1-')
+    # Other collections keep their tags
+    assert client.get("/api/jobs", headers={"If-None-Match": jobs_etag}).status_code == 304
+
+def test_etag_depends_on_query_and_tenant(client):
+    jobs = client.get("/api/jobs").headers["etag"]
+    completed = client.get("/api/jobs", params={"status": "completed"}).headers["etag"]
+    assert completed != jobs
+    assert client.get("/api/jobs", params={"status": "completed"}, headers={"If-None-Match": jobs}).status_code == 200
+
+    server.app.dependency_overrides[server.get_current_user] = lambda: GLOBEX
+    assert client.get("/api/jobs", headers={"If-None-Match": jobs}).status_code == 200
+
+def test_version_bumps_are_per_tenant(mock_db):
+    asyncio.run(server.bump_collection_version("acme", "clients", "jobs"))
+    asyncio.run(server.bump_collection_version("acme", "clients"))
+    assert asyncio.run(server.get_collection_version("acme", "clients")) == 2
+    assert asyncio.run(server.get_collection_version("acme", "jobs")) == 1
+    assert asyncio.run(server.get_collection_version("globex", "clients")) == 0
@@ -0,0 +1,98 @@
+"""
+Behavioral tests for the streaming /api/export/{collection} endpoint.
+
+Runs against mongomock-motor, so no mongod is needed.
+
+    python -m pytest tests/test_export.py -q
+"""
+
+import asyncio
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+USER = {"id": "u1", "company_id": "acme", "email": "admin@acme.test", "full_name": "Admin", "role": "admin"}
+
+def job_doc(job_id, status, day, company_id="acme", **extra):
+    return server.Job(id=job_id, title=f"Job {job_id}", client_id="c1", service_type="Lawn", status=status,
+                      scheduled_date=datetime(2026, 6, day), estimated_duration=60, estimated_cost=100.0,
+                      company_id=company_id, **extra).dict()
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()["export_tests"]
+    asyncio.run(db.jobs.insert_many([
+        job_doc("j1", "completed", 1, last_note={"id": "n1", "text": "done, paid"}),
+        job_doc("j2", "scheduled", 10),
+        job_doc("j3", "completed", 20),
+        job_doc("x1", "completed", 1, company_id="globex"),
+    ]))
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+@pytest.fixture
+def client(mock_db):
+    server.app.dependency_overrides[server.get_current_user] = lambda: USER
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.clear()
+
+def test_csv_export_has_every_model_field(client):
+    response = client.get("/api/export/jobs", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"].startswith("attachment; filename=jobs_")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert list(rows[0]) == list(server.Job.model_fields)
+    assert sorted(row["id"] for row in rows) == ["j1", "j2", "j3"]
+    j1 = next(row for row in rows if row["id"] == "j1")
+    assert j1["scheduled_date"] == "2026-06-01T00:00:00"
+    assert json.loads(j1["last_note"]) == {"id": "n1", "text": "done, paid"}
+
+def test_ndjson_export_with_filters(client):
+    response = client.get("/api/export/jobs", params={
+        "format": "ndjson", "status": "completed", "date_from": "2026-06-05T00:00:00"
+    }, headers={"Accept-Encoding": "identity"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["j3"]
+
+def test_gzip_follows_accept_encoding_q_values(client):
+    assert client.get("/api/export/jobs", headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+    for refused in ("gzip;q=0", "identity", "br;q=0, gzip;q=0"):
+        assert "content-encoding" not in client.get("/api/export/jobs", headers={"Accept-Encoding": refused}).headers
+
+def test_invalid_requests(client):
+    assert client.get("/api/export/users").status_code == 404
+    assert client.get("/api/export/jobs", params={"format": "xml"}).status_code == 400
+    assert client.get("/api/export/clients", params={"status": "active"}).status_code == 400
+
+def test_chunks_are_bounded_and_gzip_stream_decodes(monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_CHUNK_SIZE", 256)
+    docs = [{"id": f"j{i}", "title": "x" * 50} for i in range(40)]
+
+    async def cursor():
+        for doc in docs:
+            yield doc
+
+    async def collect(compress):
+        return [chunk async for chunk in server.iter_export_chunks(cursor(), ["id", "title"], "ndjson", compress)]
+
+    chunks = asyncio.run(collect(False))
+    assert len(chunks) > 1 and all(len(chunk) < 256 + 100 for chunk in chunks)
+    plain = b"".join(chunks)
+    assert [json.loads(line)["id"] for line in plain.splitlines()] == [doc["id"] for doc in docs]
+    assert zlib.decompress(b"".join(asyncio.run(collect(True))), 16 + zlib.MAX_WBITS) == plain
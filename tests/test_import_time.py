@@ -0,0 +1,44 @@
+"""
+Cold-start guard for the API process.
+
+Imports the app in a fresh interpreter under `python -X importtime` and fails when a heavy
+dependency that is only needed by a few routes lands on the import path, or when the total
+import time exceeds IMPORT_TIME_BUDGET_MS (default 1200ms; raise it on slow CI machines).
+
+    python -m pytest tests/test_import_time.py -q
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+IMPORT_TIME_BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "1200"))
+# Imported at first use inside server.py
+DEFERRED_MODULES = {"pandas", "numpy", "pyarrow", "reportlab", "stripe", "smtplib"}
+
+def import_times(module: str):
+    """Return {module name: cumulative microseconds} for a cold import of `module`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+        env={**os.environ, "MONGO_URL": os.environ.get("MONGO_URL", "mongodb://localhost:27017")},
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+def test_heavy_dependencies_are_not_imported_at_startup():
+    times = import_times("server")
+    loaded = sorted({name.split(".")[0] for name in times} & DEFERRED_MODULES)
+    assert not loaded, f"imported at startup, move these imports to first use: {loaded}"
+
+def test_import_time_budget():
+    total_ms = import_times("server")["server"] / 1000
+    assert total_ms <= IMPORT_TIME_BUDGET_MS, f"import server took {total_ms:.0f}ms (budget {IMPORT_TIME_BUDGET_MS:.0f}ms)"
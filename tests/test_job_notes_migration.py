@@ -0,0 +1,96 @@
+"""
+Behavioral tests for `manage.py migrate-job-notes` and the paginated job notes it feeds.
+
+Runs against mongomock-motor, so no mongod is needed.
+
+    python -m pytest tests/test_job_notes_migration.py -q
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import manage  # noqa: E402
+import server  # noqa: E402
+
+USER = {"id": "u1", "company_id": "acme", "email": "admin@acme.test", "full_name": "Admin", "role": "admin"}
+CREATED = datetime(2026, 5, 1)
+
+def embedded_job(job_id, notes=(), photos=()):
+    job = server.Job(id=job_id, title=f"Job {job_id}", client_id="c1", service_type="Lawn", scheduled_date=CREATED,
+                     estimated_duration=60, estimated_cost=100.0, company_id="acme",
+                     created_at=CREATED, updated_at=CREATED).dict()
+    del job["notes_count"], job["photos_count"], job["last_note"]
+    return {**job, "notes": list(notes), "photos": list(photos)}
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()["job_notes_migration_tests"]
+    asyncio.run(db.jobs.insert_many([
+        embedded_job("j1", notes=[
+            {"text": "First visit", "created_by": "Ann", "created_at": "2026-05-02T09:00:00Z"},
+            {"text": "Second visit", "created_by": "Bob", "created_at": datetime(2026, 5, 3, 9)},
+        ], photos=["photos/j1-a.jpg"]),
+        embedded_job("j2"),
+        embedded_job("j3", notes=[{"text": "Only note", "created_by": "Ann", "created_at": "2026-05-04T09:00:00"}]),
+    ]))
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(manage, "db", db)
+    return db
+
+@pytest.fixture
+def client(mock_db):
+    server.app.dependency_overrides[server.get_current_user] = lambda: USER
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.clear()
+
+def migrate(batch_size=2):
+    asyncio.run(manage.migrate_embedded_job_notes(batch_size))
+
+def test_migration_moves_notes_and_counts_them(client, mock_db):
+    migrate()
+    j1 = asyncio.run(mock_db.jobs.find_one({"id": "j1"}))
+    assert "notes" not in j1 and "photos" not in j1
+    assert (j1["notes_count"], j1["photos_count"]) == (2, 1)
+    assert j1["last_note"]["text"] == "Second visit"
+    assert j1["updated_at"] > CREATED  # delta sync resends the reshaped job
+
+    page = client.get("/api/jobs/j1/notes").json()
+    assert [(note["kind"], note["text"]) for note in page["notes"]] == [
+        ("note", "Second visit"), ("note", "First visit"), ("photo", None)
+    ]
+    assert page["notes"][1]["created_at"] == "2026-05-02T09:00:00"
+    assert page["next_cursor"] is None
+
+def test_conditional_get_is_not_answered_304_after_migrating(client, mock_db):
+    first = client.get("/api/jobs")
+    etag = first.headers["etag"]
+    assert client.get("/api/jobs", headers={"If-None-Match": etag}).status_code == 304
+
+    migrate()
+    response = client.get("/api/jobs", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert {job["id"]: job["notes_count"] for job in response.json()} == {"j1": 2, "j2": 0, "j3": 1}
+
+def test_rerun_moves_nothing_twice_and_picks_up_new_embedded_notes(client, mock_db):
+    migrate()
+    migrate()
+    assert asyncio.run(mock_db.job_notes.count_documents({})) == 4
+    assert asyncio.run(mock_db.jobs.find_one({"id": "j1"}))["notes_count"] == 2
+
+    # A job written with an embedded array after the migration completed is rescanned
+    asyncio.run(mock_db.jobs.insert_one(embedded_job("j4", notes=[{"text": "Late", "created_at": CREATED}])))
+    migrate()
+    assert asyncio.run(mock_db.jobs.find_one({"id": "j4"}))["notes_count"] == 1
+    assert asyncio.run(mock_db.job_notes.count_documents({})) == 5
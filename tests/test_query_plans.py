@@ -0,0 +1,242 @@
+"""
+Query-plan regression tests.
+
+Seeds a local MongoDB with synthetic tenants, drives every read route through the app
+while recording the commands it sends, and runs each distinct query through
+explain("executionStats"). A route fails when it errors or sends no queries of its own,
+when its plan falls back to a COLLSCAN or a blocking in-memory SORT, or when it examines
+far more documents than it returns. Adding a GET route without listing it in ROUTES fails
+test_every_read_route_is_covered.
+
+The plan tests are opt-in: they need a reachable mongod (MONGO_URL, default
+mongodb://localhost:27017) and are skipped without one. Set QUERY_PLAN_REQUIRE_MONGOD=1
+to make a missing mongod fail them instead, as the backend-tests CI workflow does.
+
+    docker run -d -p 27017:27017 mongo:7
+    QUERY_PLAN_REQUIRE_MONGOD=1 python -m pytest tests/test_query_plans.py -q
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ["DB_NAME"] = os.environ.get("QUERY_PLAN_DB_NAME", "jobber_pro_query_plans")
+
+import generate_data  # noqa: E402
+import server  # noqa: E402
+
+MONGO_URL = os.environ["MONGO_URL"]
+DB_NAME = os.environ["DB_NAME"]
+REQUIRE_MONGOD = os.environ.get("QUERY_PLAN_REQUIRE_MONGOD") == "1"
+ANCHOR = datetime(2026, 6, 1)
+
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct"}
+FORBIDDEN_STAGES = {"COLLSCAN", "SORT"}
+# docsExamined may exceed nReturned by this factor (plus EXAMINE_SLACK) before a route fails
+MAX_EXAMINE_RATIO = 2
+EXAMINE_SLACK = 10
+EXAMINE_RATIO_OVERRIDES = {
+    # priority is a low-cardinality residual filter on (company_id, scheduled_date); not worth its own index
+    "/api/jobs?priority=high": 10,
+}
+# Stages a route may use despite FORBIDDEN_STAGES
+STAGE_OVERRIDES = {
+    # ranking by textScore sorts the tenant's text matches in memory; there is no index order to follow
+    "/api/search?q={client_last_name}": {"SORT"},
+    "/api/search?q={client_prefix}": {"SORT"},
+    "/api/search?q={client_phone}": {"SORT"},
+}
+
+# Every GET route under /api, with the query strings worth checking separately.
+# Placeholders are filled from the seeded tenant.
+ROUTES = [
+    ("/api/clients", ""),
+    ("/api/clients/suggest", "?prefix={client_prefix}"),
+    ("/api/clients/{client_id}", ""),
+    ("/api/jobs", ""),
+    ("/api/jobs", "?status=completed"),
+    ("/api/jobs", "?priority=high"),
+    ("/api/jobs", "?fields=title,status,scheduled_date"),
+    ("/api/jobs/{job_id}", ""),
+    ("/api/jobs/{job_id}/notes", ""),
+    ("/api/jobs/{job_id}/time-entries", ""),
+    ("/api/jobs/{job_id}/total-time", ""),
+    ("/api/invoices", ""),
+    ("/api/invoices/{invoice_id}/pdf", ""),
+    ("/api/dashboard/stats", ""),
+    ("/api/dashboard/recent-jobs", ""),
+    ("/api/analytics/revenue", "?period=monthly"),
+    ("/api/analytics/jobs", ""),
+    ("/api/analytics/clients", ""),
+    ("/api/analytics/business-insights", ""),
+    ("/api/analytics/snapshots", ""),
+    ("/api/technicians", ""),
+    ("/api/technicians/{technician_id}", ""),
+    ("/api/time-entries", ""),
+    ("/api/time-entries", "?date_from={month_ago}"),
+    ("/api/time-entries", "?technician_id={technician_id}"),
+    ("/api/time-entries/active", ""),
+    ("/api/notifications", ""),
+    ("/api/notifications", "?unread_only=true"),
+    ("/api/forms", ""),
+    ("/api/forms/{form_id}", ""),
+    ("/api/forms/{form_id}/submissions", ""),
+    ("/api/search", "?q={client_last_name}"),
+    ("/api/search", "?q={client_prefix}"),
+    ("/api/search", "?q={client_phone}"),
+    ("/api/sync", ""),
+    ("/api/sync", "?limit=50"),
+    ("/api/export/{collection}", ""),
+    ("/api/export/{collection}", "?status=completed&date_from={month_ago}"),
+]
+# GET routes that never query per-tenant collections
+UNCHECKED_ROUTES = {
+    "/api/analytics/snapshots/{collection}/{partition}/{filename}",
+    "/api/admin/profile/slow-requests",
+}
+
+class CommandRecorder(monitoring.CommandListener):
+    """Keep every read command the app sends so it can be explained afterwards."""
+
+    def __init__(self):
+        self.commands = []
+
+    def started(self, event):
+        if event.command_name in EXPLAINABLE_COMMANDS:
+            self.commands.append((event.command_name, dict(event.command)))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def is_auth_lookup(command_name: str, command: dict) -> bool:
+    """The users lookup get_current_user sends for every authenticated request."""
+    return command_name == "find" and command.get("find") == "users" and set(command.get("filter", {})) == {"email"}
+
+def explainable(command_name: str, command: dict) -> dict:
+    """Turn a recorded command into one whose explain output reflects the documents it reads.
+
+    Aggregations are explained through their leading $match as a find, since a pushed-down
+    $group reports nReturned after grouping.
+    """
+    command = {k: v for k, v in command.items() if not k.startswith("$") and k not in ("lsid", "txnNumber")}
+    if command_name == "aggregate" and command.get("pipeline") and "$match" in command["pipeline"][0]:
+        return {"find": command["aggregate"], "filter": command["pipeline"][0]["$match"]}
+    return command
+
+def plan_stages(explain: dict):
+    """Yield every stage name in the winning plan(s) of an explain document."""
+    def walk(node, in_winning_plan):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "stage" and in_winning_plan and isinstance(value, str):
+                    yield value.upper()
+                elif key != "rejectedPlans":
+                    yield from walk(value, in_winning_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                yield from walk(item, in_winning_plan)
+    yield from walk(explain, False)
+
+def execution_totals(explain: dict):
+    stats = explain.get("executionStats", {})
+    return stats.get("totalDocsExamined", 0), stats.get("nReturned", 0)
+
+@pytest.fixture(scope="module")
+def seeded():
+    sync_client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=2000)
+    try:
+        sync_client.admin.command("ping")
+    except PyMongoError as e:
+        if REQUIRE_MONGOD:
+            pytest.fail(f"QUERY_PLAN_REQUIRE_MONGOD=1 but no MongoDB at {MONGO_URL}: {e}")
+        pytest.skip(f"opt-in: start a mongod at {MONGO_URL} to check query plans ({e})")
+
+    from fastapi.testclient import TestClient
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    sync_client.drop_database(DB_NAME)
+    sync_db = sync_client[DB_NAME]
+    # A large tenant under test next to a small one, so missing company_id prefixes show up
+    tenants = [generate_data.generate_tenant(7, index, jobs, ANCHOR) for index, jobs in ((0, 3000), (1, 500))]
+    for docs in tenants:
+        for collection in generate_data.COLLECTION_ORDER:
+            if docs[collection]:
+                sync_db[collection].insert_many(docs[collection])
+    for collection, models in server.INDEXES.items():
+        sync_db[collection].create_indexes(models)
+
+    recorder = CommandRecorder()
+    original_db = server.db
+    server.db = AsyncIOMotorClient(MONGO_URL, event_listeners=[recorder])[DB_NAME]
+    docs = tenants[0]
+    admin = next(user for user in docs["users"] if user["role"] == "admin")
+    values = {
+        "client_id": docs["clients"][0]["id"],
+        "client_last_name": docs["clients"][0]["name"].split()[-1],
+        "client_prefix": docs["clients"][0]["name"][:3].lower(),
+        "client_phone": docs["clients"][0]["phone_digits"][:8],
+        "job_id": next(job["id"] for job in docs["jobs"] if job["status"] == "completed"),
+        "invoice_id": docs["invoices"][0]["id"],
+        "technician_id": next(user["id"] for user in docs["users"] if user["role"] == "technician"),
+        "form_id": docs["custom_forms"][0]["id"] if docs["custom_forms"] else "missing",
+        "collection": "jobs",
+        "month_ago": (ANCHOR - timedelta(days=30)).isoformat(),
+    }
+    try:
+        with TestClient(server.app, raise_server_exceptions=False) as client:
+            client.headers["Authorization"] = f"Bearer {server.create_access_token(data={'sub': admin['email']})}"
+            yield client, recorder, sync_db, values
+    finally:
+        server.db = original_db
+        sync_client.drop_database(DB_NAME)
+        sync_client.close()
+
+def test_every_read_route_is_covered():
+    read_routes = {
+        route.path for route in server.app.routes
+        if route.path.startswith("/api/") and "GET" in getattr(route, "methods", ())
+    }
+    missing = read_routes - {path for path, _ in ROUTES} - UNCHECKED_ROUTES
+    assert not missing, f"add these routes to ROUTES in {Path(__file__).name}: {sorted(missing)}"
+
+@pytest.mark.parametrize("path,query", ROUTES, ids=[path + query for path, query in ROUTES])
+def test_route_query_plans(seeded, path, query):
+    client, recorder, sync_db, values = seeded
+    route = path + query
+    recorder.commands.clear()
+    response = client.get((path + query).format(**values))
+    assert response.status_code < 400, response.text
+    # A route that answers without reaching its own queries would otherwise pass with nothing explained
+    assert any(not is_auth_lookup(*command) for command in recorder.commands), f"{route} sent no queries"
+
+    problems = []
+    explained = set()
+    max_ratio = EXAMINE_RATIO_OVERRIDES.get(route, MAX_EXAMINE_RATIO)
+    forbidden = FORBIDDEN_STAGES - STAGE_OVERRIDES.get(route, set())
+    for command_name, command in list(recorder.commands):
+        shape = (server.command_shape(command_name, command), json.dumps(command.get("sort"), default=str))
+        if shape in explained:
+            continue
+        explained.add(shape)
+
+        explain = sync_db.command("explain", explainable(command_name, command), verbosity="executionStats")
+        stages = set(plan_stages(explain)) & forbidden
+        if stages:
+            problems.append(f"{shape[0]} sort={shape[1]}: {', '.join(sorted(stages))} in winning plan")
+        examined, returned = execution_totals(explain)
+        if examined > returned * max_ratio + EXAMINE_SLACK:
+            problems.append(f"{shape[0]}: examined {examined} documents to return {returned}")
+
+    assert not problems, f"{route}:\n  " + "\n  ".join(problems)
@@ -0,0 +1,136 @@
+"""
+Behavioral tests for /api/search ranking and error handling.
+
+mongomock has no $text support, so db[collection].find is stubbed with canned text and
+prefix matches; no mongod is needed.
+
+    python -m pytest tests/test_search.py -q
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import ExecutionTimeout
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+USER = {"id": "u1", "company_id": "acme", "email": "admin@acme.test", "full_name": "Admin", "role": "admin"}
+
+class StubCursor:
+    def __init__(self, docs, error=None):
+        self.docs = docs
+        self.error = error
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def limit(self, limit):
+        self.docs = self.docs[:limit]
+        return self
+
+    def max_time_ms(self, ms):
+        return self
+
+    async def to_list(self, length):
+        if self.error:
+            raise self.error
+        return [dict(doc) for doc in self.docs]
+
+class StubCollection:
+    def __init__(self, text=(), prefix=(), error=None):
+        self.text = list(text)
+        self.prefix = list(prefix)
+        self.error = error
+        self.filters = []
+
+    def find(self, filter_dict, projection=None, **kwargs):
+        self.filters.append(filter_dict)
+        if "$text" in filter_dict:
+            return StubCursor(self.text, self.error)
+        return StubCursor(self.prefix, self.error)
+
+class StubDb(dict):
+    def __getattr__(self, name):
+        return self[name]
+
+@pytest.fixture
+def stub_db(monkeypatch):
+    db = StubDb(
+        clients=StubCollection(
+            text=[
+                {"id": "c1", "name": "Ann Smith", "email": "ann@x.test", "phone": "1", "score": 7.5},
+                {"id": "c2", "name": "Smithers Plumbing", "email": None, "phone": None, "score": 5.0},
+            ],
+            prefix=[{"id": "c2", "name": "Smithers Plumbing", "email": None, "phone": None}],
+        ),
+        jobs=StubCollection(text=[{"id": "j1", "title": "Smith kitchen sink", "status": "scheduled", "score": 9.0}]),
+        invoices=StubCollection(),
+    )
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+@pytest.fixture
+def client(stub_db):
+    server.app.dependency_overrides[server.get_current_user] = lambda: USER
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.clear()
+
+def test_prefix_match_is_boosted_above_text_matches(stub_db):
+    results = asyncio.run(server.search_type("client", "acme", "Smith", 10))
+    assert [r["id"] for r in results] == ["c2", "c1"]
+    assert results[0]["score"] == 5.0 + server.SEARCH_PREFIX_BONUS
+    assert results[1] == {"type": "client", "id": "c1", "title": "Ann Smith", "score": 7.5,
+                          "fields": {"email": "ann@x.test", "phone": "1"}}
+    # Both queries are scoped to the tenant
+    assert all(f["company_id"] == "acme" for f in stub_db["clients"].filters)
+
+def test_prefix_only_match_and_limit(stub_db):
+    stub_db["clients"].text = []
+    assert [r["score"] for r in asyncio.run(server.search_type("client", "acme", "Smi", 10))] == [server.SEARCH_PREFIX_BONUS]
+    stub_db["clients"].text = [{"id": f"c{i}", "name": f"Smith {i}", "score": float(i)} for i in range(5)]
+    assert len(asyncio.run(server.search_type("client", "acme", "Smith", 3))) == 3
+
+def test_phone_like_query_matches_phone_digits(stub_db):
+    asyncio.run(server.search_type("client", "acme", "(555) 01", 10))
+    prefix_filter = next(f for f in stub_db["clients"].filters if "$text" not in f)
+    assert prefix_filter == {"company_id": "acme", "phone_digits": {"$gte": "55501", "$lt": "55501\uffff"}}
+    # Digits mixed with letters still match names
+    asyncio.run(server.search_type("client", "acme", "Unit 5", 10))
+    assert "name" in stub_db["clients"].filters[-1]
+
+def test_types_without_prefix_field_only_run_text_query(stub_db):
+    asyncio.run(server.search_type("job", "acme", "sink", 10))
+    assert len(stub_db["jobs"].filters) == 1 and "$text" in stub_db["jobs"].filters[0]
+
+def test_results_are_merged_across_types_by_score(client):
+    response = client.get("/api/search", params={"q": " Smith "})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["query"] == "Smith"
+    assert [(r["type"], r["id"]) for r in body["results"]] == [("client", "c2"), ("job", "j1"), ("client", "c1")]
+    assert body["timed_out"] == []
+
+def test_types_filter(client, stub_db):
+    response = client.get("/api/search", params={"q": "Smith", "types": "job"})
+    assert [r["type"] for r in response.json()["results"]] == ["job"]
+    assert stub_db["clients"].filters == []
+
+def test_unknown_type_and_blank_query_are_rejected(client):
+    response = client.get("/api/search", params={"q": "Smith", "types": "job,widget"})
+    assert response.status_code == 400
+    assert "widget" in response.json()["detail"]
+    assert client.get("/api/search", params={"q": "   "}).status_code == 400
+
+def test_timed_out_type_is_reported_and_others_returned(client, stub_db):
+    stub_db["jobs"].error = ExecutionTimeout("operation exceeded time limit")
+    body = client.get("/api/search", params={"q": "Smith"}).json()
+    assert body["timed_out"] == ["job"]
+    assert {r["type"] for r in body["results"]} == {"client"}
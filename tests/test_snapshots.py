@@ -0,0 +1,97 @@
+"""
+Behavioral tests for the incremental Parquet snapshot export behind /api/analytics/snapshots.
+
+Runs against mongomock-motor and writes into a temporary directory, so no mongod is needed.
+
+    python -m pytest tests/test_snapshots.py -q
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+USER = {"id": "u1", "company_id": "acme", "email": "admin@acme.test", "full_name": "Admin", "role": "admin"}
+DAY = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=3)
+
+def job_doc(job_id, updated_at, company_id="acme"):
+    return server.Job(id=job_id, title=f"Job {job_id}", client_id="c1", service_type="Lawn", scheduled_date=DAY,
+                      estimated_duration=60, estimated_cost=100.0, company_id=company_id,
+                      created_at=updated_at, updated_at=updated_at).dict()
+
+@pytest.fixture
+def mock_db(monkeypatch, tmp_path):
+    db = AsyncMongoMockClient()["snapshot_tests"]
+    asyncio.run(db.jobs.insert_many([
+        job_doc("j1", DAY + timedelta(hours=9)),
+        job_doc("j2", DAY + timedelta(days=1, hours=9)),
+        job_doc("x1", DAY + timedelta(hours=9), company_id="globex"),
+    ]))
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "SNAPSHOT_DIR", tmp_path)
+    return db
+
+@pytest.fixture
+def client(mock_db):
+    server.app.dependency_overrides[server.get_current_user] = lambda: USER
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.clear()
+
+def exported_jobs(tmp_path) -> "pd.DataFrame":
+    return pd.read_parquet(tmp_path / "acme" / "jobs")
+
+def test_export_writes_date_partitions_and_lists_them(client, tmp_path):
+    assert client.post("/api/analytics/snapshots").status_code == 202  # the background task runs before returning
+    frame = exported_jobs(tmp_path)
+    assert sorted(frame["id"]) == ["j1", "j2"]
+    assert str(frame["scheduled_date"].dtype).startswith("datetime64")
+
+    body = client.get("/api/analytics/snapshots").json()
+    assert body["running"] is False
+    assert [(w["collection"], w["rows_exported"]) for w in body["watermarks"]] == [("jobs", 2)]
+    partitions = sorted(f["partition"] for f in body["files"] if f["collection"] == "jobs")
+    assert partitions == [f"date={DAY:%Y-%m-%d}", f"date={DAY + timedelta(days=1):%Y-%m-%d}"]
+
+    file = body["files"][0]
+    response = client.get(f"/api/analytics/snapshots/{file['collection']}/{file['partition']}/{file['filename']}")
+    assert response.status_code == 200 and response.content[:4] == b"PAR1"
+
+def test_reruns_export_only_rows_changed_since_the_watermark(client, mock_db, tmp_path):
+    asyncio.run(server.export_snapshots("acme"))
+    asyncio.run(server.export_snapshots("acme"))
+    assert len(exported_jobs(tmp_path)) == 2
+
+    asyncio.run(mock_db.jobs.update_one({"id": "j1"}, {"$set": {"status": "completed", "updated_at": DAY + timedelta(days=2)}}))
+    asyncio.run(server.export_snapshots("acme"))
+    frame = exported_jobs(tmp_path)
+    assert len(frame) == 3  # snapshots append; readers keep the latest row per id
+    assert frame.sort_values("updated_at").drop_duplicates("id", keep="last").set_index("id")["status"]["j1"] == "completed"
+
+def test_download_rejects_paths_outside_the_tenant(client, tmp_path):
+    asyncio.run(server.export_snapshots("acme"))
+    asyncio.run(server.export_snapshots("globex"))
+    globex_file = next((tmp_path / "globex" / "jobs").glob("date=*/*.parquet"))
+    assert client.get(f"/api/analytics/snapshots/jobs/{globex_file.parent.name}/{globex_file.name}").status_code == 404
+    assert client.get("/api/analytics/snapshots/users/date=2026-01-01/x.parquet").status_code == 404
+    assert client.get("/api/analytics/snapshots/jobs/..%2F..%2Fglobex/x.parquet").status_code == 404
+
+def test_second_export_is_refused_while_one_runs(client):
+    server.running_snapshots.add("acme")
+    try:
+        assert client.post("/api/analytics/snapshots").status_code == 409
+    finally:
+        server.running_snapshots.discard("acme")
@@ -0,0 +1,96 @@
+"""
+Behavioral tests for /api/sync: full and delta passes, tombstones, paging and the settle window.
+
+Runs against mongomock-motor, so no mongod is needed.
+
+    python -m pytest tests/test_sync.py -q
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+import server  # noqa: E402
+
+USER = {"id": "t1", "company_id": "acme", "email": "tech@acme.test", "full_name": "Tech One", "role": "technician"}
+CLIENT = {"name": "Ann", "email": "ann@example.com", "phone": "1", "address": "1 Main St"}
+
+def client_doc(client_id, company_id="acme", minutes_ago=60):
+    updated = datetime.utcnow().replace(microsecond=0) - timedelta(minutes=minutes_ago)
+    return server.Client(id=client_id, **{**CLIENT, "email": f"{client_id}@example.com"}, company_id=company_id,
+                         created_at=updated, updated_at=updated).dict()
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    db = AsyncMongoMockClient()["sync_tests"]
+    asyncio.run(db.clients.insert_many([client_doc("c1"), client_doc("c2", minutes_ago=30), client_doc("x1", "globex")]))
+    monkeypatch.setattr(server, "db", db)
+    return db
+
+@pytest.fixture
+def client(mock_db):
+    server.app.dependency_overrides[server.get_current_user] = lambda: USER
+    try:
+        yield TestClient(server.app)
+    finally:
+        server.app.dependency_overrides.clear()
+
+def sync(client, token=None, **params):
+    response = client.get("/api/sync", params={**params, **({"since": token} if token else {})})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_full_sync_returns_the_tenants_documents(client):
+    body = sync(client)
+    assert [c["id"] for c in body["changes"]["clients"]] == ["c1", "c2"]
+    assert body["changes"]["jobs"] == [] and body["deleted"] == {}
+    assert body["has_more"] is False
+
+    # Nothing changed since
+    body = sync(client, body["next_token"])
+    assert body["changes"]["clients"] == [] and body["deleted"] == {}
+
+def test_delta_sync_returns_updates_and_tombstones(client, monkeypatch):
+    token = sync(client)["next_token"]
+    monkeypatch.setattr(server, "SYNC_SETTLE_SECONDS", 0)
+    client.put("/api/clients/c1", json={**CLIENT, "email": "c1@example.com", "name": "Ann Renamed"})
+    assert client.delete("/api/clients/c2").status_code == 200
+
+    body = sync(client, token)
+    assert [(c["id"], c["name"]) for c in body["changes"]["clients"]] == [("c1", "Ann Renamed")]
+    assert body["deleted"] == {"clients": ["c2"]}
+
+    body = sync(client, body["next_token"])
+    assert body["changes"]["clients"] == [] and body["deleted"] == {}
+
+def test_writes_inside_the_settle_window_arrive_in_the_next_pass(client, monkeypatch):
+    token = sync(client)["next_token"]
+    client.put("/api/clients/c1", json={**CLIENT, "email": "c1@example.com", "name": "Just Now"})
+
+    # The write landed after this pass's cutoff, so it is left for the next one
+    body = sync(client, token)
+    assert body["changes"]["clients"] == []
+
+    monkeypatch.setattr(server, "SYNC_SETTLE_SECONDS", 0)
+    body = sync(client, body["next_token"])
+    assert [c["name"] for c in body["changes"]["clients"]] == ["Just Now"]
+
+def test_pages_resume_after_the_last_document(client):
+    first = sync(client, limit=1)
+    assert [c["id"] for c in first["changes"]["clients"]] == ["c1"] and first["has_more"] is True
+    second = sync(client, first["next_token"], limit=1)
+    assert [c["id"] for c in second["changes"]["clients"]] == ["c2"]
+
+def test_invalid_and_expired_tokens(client):
+    assert client.get("/api/sync", params={"since": "not-a-token"}).status_code == 400
+    expired = datetime.utcnow() - timedelta(days=server.SYNC_TOMBSTONE_TTL_DAYS + 1)
+    token = server.encode_sync_token(None, {"deleted": [expired.isoformat(), None]})
+    assert client.get("/api/sync", params={"since": token}).status_code == 410